@@ -0,0 +1,176 @@
+import pandas as pd
+
+from pandas_oop import models
+
+from .common import DB_CONNECTION, SIZES, BenchJobs, BenchPeople, people, people_csv, people_rows, raw_people, \
+    reset_table
+
+
+class TimeInstantiation:
+    def time_empty_model(self):
+        BenchPeople()
+
+
+class TimeFromDf:
+    params = [SIZES]
+    param_names = ['n_rows']
+
+    def setup(self, n_rows):
+        self.raw = raw_people(n_rows)
+
+    def time_from_df(self, n_rows):
+        BenchPeople(from_df=self.raw)
+
+
+class TimeFromCsv:
+    params = [SIZES, [None, 100_000]]
+    param_names = ['n_rows', 'chunksize']
+    timeout = 600
+
+    def setup_cache(self):
+        for n_rows in SIZES:
+            people_csv(n_rows)
+
+    def time_from_csv(self, n_rows, chunksize):
+        if chunksize is None:
+            BenchPeople(from_csv=people_csv(n_rows))
+        else:
+            for _ in BenchPeople(from_csv=people_csv(n_rows), chunksize=chunksize):
+                pass
+
+    def peakmem_from_csv(self, n_rows, chunksize):
+        self.time_from_csv(n_rows, chunksize)
+
+
+class TimeFromIterator:
+    params = [SIZES]
+    param_names = ['n_rows']
+    timeout = 600
+
+    def setup(self, n_rows):
+        self.rows = people_rows(n_rows)
+
+    def time_from_iterator(self, n_rows):
+        BenchPeople(from_iterator=self.rows)
+
+
+class TimeValidation:
+    """
+    validate() converts the columns in place, so every sample starts from a fresh unconverted dataframe
+    """
+    params = [SIZES]
+    param_names = ['n_rows']
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    def setup(self, n_rows):
+        raw = raw_people(n_rows)
+        raw['is_staff'] = raw['is_staff'] == 'yes'
+        self.unconverted = models.DataFrame.generic_overrider(raw.astype({'age': 'float64'}), BenchPeople())
+        self.valid = people(n_rows)
+
+    def time_validate(self, n_rows):
+        self.unconverted.validate()
+
+    def time_is_valid(self, n_rows):
+        self.valid.is_valid()
+
+
+class TimeOperationOverhead:
+    """
+    Operations returning a custom dataframe (the model travels through _constructor / __finalize__)
+    """
+    params = [SIZES]
+    param_names = ['n_rows']
+    timeout = 600
+
+    def setup(self, n_rows):
+        self.people = people(n_rows)
+        self.plain_result = pd.DataFrame(self.people).head(5)
+        self.jobs = BenchJobs(from_df=pd.DataFrame({'person_id': self.people.person_id, 'job': 'engineer'}))
+        self.mask = self.people.age > 50
+
+    def time_head(self, n_rows):
+        self.people.head(5)
+
+    def time_slice(self, n_rows):
+        self.people[:1000]
+
+    def time_boolean_indexing(self, n_rows):
+        self.people[self.mask]
+
+    def time_merge(self, n_rows):
+        self.people.merge(self.jobs, on='person_id')
+
+    def time_generic_overrider(self, n_rows):
+        models.DataFrame.generic_overrider(self.plain_result, self.people)
+
+
+class TimeSave:
+    """
+    save() in an empty table of a SQLite file
+    """
+    params = [SIZES]
+    param_names = ['n_rows']
+    number = 1
+    repeat = 3
+    timeout = 1200
+
+    def setup(self, n_rows):
+        self.people = people(n_rows)
+        reset_table()
+
+    def time_save(self, n_rows):
+        self.people.save()
+
+
+class TimeSaveIfRowExists(TimeSave):
+    """
+    save(if_row_exists='update') when half of the rows already exist
+    """
+
+    def setup(self, n_rows):
+        super().setup(n_rows)
+        self.people.head(n_rows // 2).save()
+
+    def time_save(self, n_rows):
+        self.people.save(if_row_exists='update')
+
+
+class TimeFromSqlQuery:
+    params = [SIZES]
+    param_names = ['n_rows']
+    timeout = 1200
+
+    def setup(self, n_rows):
+        reset_table()
+        people(n_rows).save()
+
+    def time_from_sql_query(self, n_rows):
+        BenchPeople(from_sql_query='select * from bench_people')
+
+    def time_from_sql_query_chunked(self, n_rows):
+        for _ in BenchPeople(from_sql_query='select * from bench_people', chunksize=100_000):
+            pass
+
+
+class TimeFromSqlQueryCached:
+    """
+    from_sql_query answered by the query cache of the connection (every hit returns a copy of the cached dataframe)
+    """
+    params = [SIZES]
+    param_names = ['n_rows']
+    timeout = 1200
+
+    def setup(self, n_rows):
+        reset_table()
+        people(n_rows).save()
+        DB_CONNECTION.query_cache = models.QueryCache(max_bytes=2 ** 33)
+        BenchPeople(from_sql_query='select * from bench_people')
+
+    def teardown(self, n_rows):
+        DB_CONNECTION.query_cache = None
+
+    def time_from_sql_query_cached(self, n_rows):
+        BenchPeople(from_sql_query='select * from bench_people')
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from pandas_oop import models
+from pandas_oop.fields import FloatColumn
+
+
+def wide_model(n_columns):
+    return models.Data(type(f'Wide{n_columns}', (models.DataFrame,),
+                            {f'col_{i}': FloatColumn() for i in range(n_columns)}))
+
+
+class TimeResultWrapping:
+    """
+    Cost of returning a custom dataframe from head, slicing and boolean indexing.
+    The wrapping overhead should stay flat when the number of columns grows.
+    """
+    params = [10, 40, 160]
+    param_names = ['n_columns']
+
+    def setup(self, n_columns):
+        data = pd.DataFrame(np.random.rand(200_000, n_columns), columns=[f'col_{i}' for i in range(n_columns)])
+        self.df = wide_model(n_columns)(from_df=data)
+        self.plain_result = pd.DataFrame(self.df).head(5)
+        self.mask = self.df['col_0'] > 0.99
+
+    def time_generic_overrider(self, n_columns):
+        models.DataFrame.generic_overrider(self.plain_result, self.df)
+
+    def time_head(self, n_columns):
+        self.df.head(5)
+
+    def time_slice(self, n_columns):
+        self.df[:5]
+
+    def time_boolean_indexing(self, n_columns):
+        self.df[self.mask]
+
+
+class TimeOperationOverhead:
+    """
+    Per call cost of common operations on a custom dataframe compared to the same plain pandas dataframe.
+    The model type travels through _constructor / __finalize__, so both should stay within noise of each other.
+    """
+    params = (['plain', 'model'], ['head', 'sort_values', 'assign', 'query', 'concat'])
+    param_names = ['frame', 'operation']
+
+    def setup(self, frame, operation):
+        data = pd.DataFrame(np.random.rand(1_000, 10), columns=[f'col_{i}' for i in range(10)])
+        self.df = wide_model(10)(from_df=data) if frame == 'model' else data
+        self.operation = {
+            'head': lambda df: df.head(5),
+            'sort_values': lambda df: df.sort_values('col_0'),
+            'assign': lambda df: df.assign(col_10=1.0),
+            'query': lambda df: df.query('col_0 > 0.5'),
+            'concat': lambda df: pd.concat([df, df]),
+        }[operation]
+
+    def time_operation(self, frame, operation):
+        self.operation(self.df)
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pandas_oop import models
+from pandas_oop.fields import StringColumn, IntegerColumn, FloatColumn
+
+DB_CONNECTION = models.Connection(f'sqlite:///{os.path.join(tempfile.mkdtemp(), "bench_upsert.db")}')
+
+
+@models.sql(table='accounts', con=DB_CONNECTION)
+@models.Data
+class Accounts(models.DataFrame):
+    account_id = IntegerColumn(unique=True)
+    owner = StringColumn()
+    balance = FloatColumn()
+
+
+class TimeUpsert:
+    """
+    save(if_row_exists='update') on SQLite: native INSERT ... ON CONFLICT engine (batch and staging strategies)
+    against the pangres path. Half of the rows already exist in the table.
+    """
+    params = [[10_000, 100_000], ['batch', 'staging', 'pangres']]
+    param_names = ['n_rows', 'engine']
+    timeout = 300
+
+    def setup(self, n_rows, engine):
+        self.accounts = Accounts(from_df=pd.DataFrame({
+            'account_id': np.arange(n_rows),
+            'owner': np.random.choice(['John', 'Snow', 'Armin'], n_rows),
+            'balance': np.random.rand(n_rows),
+        }))
+        Accounts.sqlalchemy_class.__table__.drop(DB_CONNECTION.sql_engine, checkfirst=True)
+        self.accounts.head(n_rows // 2).save(if_row_exists='update')
+
+    def time_upsert(self, n_rows, engine):
+        if engine == 'pangres':
+            # pangres sends multi-values statements, SQLite limits the number of variables per statement
+            self.accounts.save(if_row_exists='update', upsert_engine='pangres', chunksize=5_000)
+        else:
+            self.accounts.save(if_row_exists='update', strategy=engine)
@@ -0,0 +1,82 @@
+"""
+Synthetic data and models shared by the benchmarks.
+
+The sizes can be restricted with the PANDAS_OOP_BENCH_SIZES environment variable (for example
+PANDAS_OOP_BENCH_SIZES=10000,1000000), the 1e7 rows cases need a few GB of memory.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pandas_oop import models
+from pandas_oop.fields import StringColumn, IntegerColumn, FloatColumn, DateColumn, BoolColumn
+
+SIZES = [int(size) for size in os.environ.get('PANDAS_OOP_BENCH_SIZES', '10000,1000000,10000000').split(',')]
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'pandas_oop_benchmarks')
+os.makedirs(DATA_DIR, exist_ok=True)
+
+DB_CONNECTION = models.Connection(f'sqlite:///{os.path.join(DATA_DIR, "bench_lifecycle.db")}')
+
+NAMES = np.array(['John', 'Snow', 'Armin', 'Marie', 'Mikasa', 'Eren', 'Levi', 'Hange'], dtype=object)
+
+
+@models.sql(table='bench_people', con=DB_CONNECTION)
+@models.Data
+class BenchPeople(models.DataFrame):
+    person_id = IntegerColumn(unique=True)
+    name = StringColumn()
+    age = IntegerColumn()
+    money = FloatColumn()
+    insertion_date = DateColumn(format='%Y-%m-%d')
+    is_staff = BoolColumn(true='yes', false='no')
+
+
+@models.Data
+class BenchJobs(models.DataFrame):
+    person_id = IntegerColumn()
+    job = StringColumn()
+
+
+def raw_people(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    People as they come from a csv file: dates as strings and bools as yes / no
+    """
+    random = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'person_id': np.arange(n_rows),
+        'name': NAMES[random.integers(0, len(NAMES), n_rows)],
+        'age': random.integers(0, 100, n_rows),
+        'money': random.random(n_rows) * 1000,
+        'insertion_date': (np.datetime64('2000-01-01') + random.integers(0, 8000, n_rows)).astype(str),
+        'is_staff': np.where(random.random(n_rows) < 0.2, 'yes', 'no'),
+    })
+
+
+def people(n_rows: int) -> 'models.DataFrame':
+    return BenchPeople(from_csv=people_csv(n_rows))
+
+
+def people_rows(n_rows: int):
+    frame = raw_people(n_rows)
+    frame['insertion_date'] = pd.to_datetime(frame['insertion_date'])
+    frame['is_staff'] = frame['is_staff'] == 'yes'
+    return list(frame.itertuples(index=False, name=None))
+
+
+def people_csv(n_rows: int) -> str:
+    """
+    Path of a csv file of n_rows people, written on the first call
+    """
+    path = os.path.join(DATA_DIR, f'people_{n_rows}.csv')
+    if not os.path.exists(path):
+        raw_people(n_rows).to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def reset_table() -> None:
+    BenchPeople.sqlalchemy_class.__table__.drop(DB_CONNECTION.sql_engine, checkfirst=True)
+    BenchPeople.sqlalchemy_class.__table__.create(DB_CONNECTION.sql_engine)
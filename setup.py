@@ -9,7 +9,13 @@ setuptools.setup(
     author="Mayas Nova",
     author_email="test@test.com",
     description="Pandas dataframes with object oriented programming style",
-    install_requires=["pandas", "pangres", "sqlalchemy"],
+    install_requires=["pandas>=1.5", "pangres", "sqlalchemy"],
+    extras_require={
+        "pyarrow": ["pyarrow"],
+        "async": ["aiosqlite", "greenlet"],
+        "opentelemetry": ["opentelemetry-api"],
+        "polars": ["polars>=1.0", "pyarrow"],
+    },
     keywords=["pandas", "oop", "dataframe", "poop"],
     long_description=long_description,
     long_description_content_type="text/markdown",
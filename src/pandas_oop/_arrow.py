@@ -0,0 +1,77 @@
+"""
+Parquet and Feather (Arrow IPC) sources of the models, read with pyarrow (pip install pandas-oop[pyarrow])
+"""
+import typing
+
+import numpy as np
+import pandas as pd
+
+FILE_FORMATS = ('parquet', 'feather')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('pyarrow is required to read parquet and feather files: pip install pandas-oop[pyarrow]') \
+            from e
+    return pyarrow
+
+
+def pandas_types(arrow_type):
+    """
+    types_mapper of the conversions to pandas, the decimals stay in arrow
+    """
+    return pd.ArrowDtype(arrow_type) if _import_pyarrow().types.is_decimal(arrow_type) else None
+
+
+def translate_filters(filters, target_by_name: typing.Mapping[str, str]):
+    """
+    Pyarrow (DNF) filters with the field names replaced by their target names
+    """
+    if not filters:
+        return filters
+    if isinstance(filters[0], tuple):
+        return [(target_by_name.get(column, column), op, value) for column, op, value in filters]
+    return [translate_filters(conjunction, target_by_name) for conjunction in filters]
+
+
+def read_table(source, file_format: str, columns: typing.List[str], filters=None, memory_map: bool = True,
+               **kwargs):
+    """
+    Arrow table of the given columns, the filters are pushed down for parquet
+    """
+    pa = _import_pyarrow()
+    if file_format == 'parquet':
+        return pa.parquet.read_table(source, columns=columns, filters=filters or None, memory_map=memory_map, **kwargs)
+    if file_format == 'feather':
+        table = pa.feather.read_table(source, columns=columns, memory_map=memory_map, **kwargs)
+        if filters:
+            table = table.filter(pa.parquet.filters_to_expression(filters))
+        return table
+    raise ValueError(f'file_format must be one of {FILE_FORMATS}, got "{file_format}"')
+
+
+def table_matches(table, target_names: typing.Sequence[str], dtypes: typing.Sequence) -> bool:
+    """
+    True when every column converts to its declared dtype as is (no validate() needed)
+    """
+    pa = _import_pyarrow()
+    for target_name, dtype in zip(target_names, dtypes):
+        arrow_type = table.schema.field(target_name).type
+        declared_dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(declared_dtype, pd.CategoricalDtype):
+            if not pa.types.is_dictionary(arrow_type):
+                return False
+        elif not isinstance(declared_dtype, np.dtype) or pa.types.is_dictionary(arrow_type):
+            return False
+        elif pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+            if declared_dtype != np.dtype(object):
+                return False
+        elif arrow_type.to_pandas_dtype() != declared_dtype:
+            return False
+        elif declared_dtype.kind in 'iub' and table.column(target_name).null_count:
+            return False
+    return True
@@ -0,0 +1,107 @@
+import itertools
+import typing
+
+import numpy as np
+import pandas as pd
+
+# number of rows transposed into the column buffers at once
+BATCH_SIZE = 4096
+
+
+def buffer_dtype(np_type) -> np.dtype:
+    """
+    Numpy dtype of the buffer that stores a column declared with np_type
+    """
+    if np_type in (np.str_, object):
+        return np.dtype(object)
+    if np_type is np.datetime64:
+        return np.dtype('datetime64[ns]')
+    return np.dtype(np_type)
+
+
+def _fits(values: np.ndarray, dtype: np.dtype) -> bool:
+    limits = np.iinfo(dtype)
+    return limits.min <= values.min() and values.max() <= limits.max
+
+
+class ColumnarBuilder:
+    """
+    Build dataframes from an iterable of row tuples, in numpy buffers of the declared types
+    """
+
+    def __init__(self, columns: typing.List[str], np_types: list, chunksize: typing.Optional[int] = None,
+                 initial_capacity: int = 1024):
+        self.columns = columns
+        self.dtypes = [buffer_dtype(np_type) for np_type in np_types]
+        self.chunksize = chunksize
+        self.initial_capacity = chunksize or initial_capacity
+        self.size = 0
+        self.buffers: typing.List[np.ndarray] = []
+        self._reset()
+
+    def build(self, rows: typing.Iterable[tuple]) -> typing.Iterator[pd.DataFrame]:
+        rows = iter(rows)
+        emitted = False
+        while True:
+            batch_size = BATCH_SIZE if self.chunksize is None else min(BATCH_SIZE, self.chunksize - self.size)
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            self._write(batch)
+            if self.chunksize is not None and self.size == self.chunksize:
+                yield self.to_frame()
+                emitted = True
+                self._reset()
+        if self.size or (not emitted and self.chunksize is None):
+            yield self.to_frame()
+
+    def to_frame(self) -> pd.DataFrame:
+        data = {}
+        for column, buffer, dtype in zip(self.columns, self.buffers, self.dtypes):
+            data[column] = buffer[:self.size]
+            if buffer.dtype != dtype:
+                # fallback buffer: let pandas infer the column type like it would for a list of rows
+                data[column] = pd.Series(data[column]).infer_objects().values
+        return pd.DataFrame(data, columns=self.columns)
+
+    def _reset(self) -> None:
+        self.size = 0
+        self.buffers = [np.empty(self.initial_capacity, dtype=dtype) for dtype in self.dtypes]
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.buffers[0])
+        while capacity < needed:
+            capacity *= 2
+        for index, buffer in enumerate(self.buffers):
+            new_buffer = np.empty(capacity, dtype=buffer.dtype)
+            new_buffer[:self.size] = buffer[:self.size]
+            self.buffers[index] = new_buffer
+
+    def _write(self, batch: typing.List[tuple]) -> None:
+        if any(len(row) != len(self.columns) for row in batch):
+            raise ValueError(f'{len(self.columns)} columns passed, every yielded row must have this length')
+        end = self.size + len(batch)
+        if end > len(self.buffers[0]):
+            self._grow(end)
+        for index, values in enumerate(zip(*batch)):
+            if not self._fill(self.buffers[index], values, end):
+                self.buffers[index] = self.buffers[index].astype(object)
+                self.buffers[index][self.size:end] = values
+        self.size = end
+
+    def _fill(self, buffer: np.ndarray, values: tuple, end: int) -> bool:
+        if buffer.dtype.kind in 'iub':
+            # numpy would silently truncate floats or cast any object to bool
+            values = np.asarray(values)
+            allowed_kinds = 'b' if buffer.dtype.kind == 'b' else 'iub'
+            if values.dtype.kind not in allowed_kinds:
+                return False
+            if buffer.dtype.kind in 'iu' and values.dtype.kind in 'iu' and not np.can_cast(values.dtype, buffer.dtype) \
+                    and len(values) and not _fits(values, buffer.dtype):
+                # numpy would wrap the values out of the range of a downcast column
+                return False
+        try:
+            buffer[self.size:end] = values
+        except (TypeError, ValueError):
+            return False
+        return True
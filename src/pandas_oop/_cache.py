@@ -0,0 +1,168 @@
+"""
+Cache of the results of Model(from_sql_query=...), attached to a models.Connection
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_$]*')
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    df: pd.DataFrame
+    tables: typing.FrozenSet[str]
+    nbytes: int
+    created: float
+
+
+class QueryCache:
+    """
+    LRU cache of max_entries results and max_bytes with an optional ttl, also written as parquet files in directory.
+    get() returns a copy of the cached dataframe.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 * 2 ** 20, ttl: typing.Optional[float] = None,
+                 directory: typing.Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = directory
+        self.stats = CacheStats()
+        self.nbytes = 0
+        self._entries: typing.OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(model_name: str, query, read_kwargs: dict, url) -> str:
+        if not isinstance(query, str):
+            compiled = query.compile()
+            query = f'{compiled} {sorted(compiled.params.items())!r}'
+        raw_key = repr((model_name, query, sorted((name, repr(value)) for name, value in read_kwargs.items()),
+                        # str() of a URL hides the password, two credentials would share the results
+                        url.render_as_string(hide_password=False)))
+        return hashlib.sha1(raw_key.encode()).hexdigest()
+
+    @staticmethod
+    def tables_of(query, model_table: str) -> typing.FrozenSet[str]:
+        """
+        Tables whose save invalidates the result (every identifier of the query)
+        """
+        if not isinstance(query, str):
+            query = str(query.compile())
+        return frozenset(IDENTIFIER.findall(query)) | {model_table}
+
+    def get(self, key: str) -> typing.Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry.created, time.monotonic()):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry.df.copy()
+        disk_entry = self._read_disk(key)
+        with self._lock:
+            if disk_entry is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self.stats.disk_hits += 1
+            self._put(key, *disk_entry)
+        return disk_entry[1].copy()
+
+    def put(self, key: str, tables: typing.FrozenSet[str], df: pd.DataFrame) -> None:
+        df = pd.DataFrame(df).copy()
+        with self._lock:
+            self._put(key, tables, df)
+        if self.directory is not None:
+            df.to_parquet(self._path(key, '.parquet'))
+            with open(self._path(key, '.tables'), 'w') as file:
+                file.write('\n'.join(sorted(tables)))
+
+    def invalidate(self, table: typing.Optional[str] = None) -> None:
+        """
+        Drop the entries that may read the table (every entry when table is None)
+        """
+        with self._lock:
+            dropped = {key for key, entry in self._entries.items() if table is None or table in entry.tables}
+            for key in dropped:
+                self._remove(key)
+        if self.directory is not None:
+            for file_name in os.listdir(self.directory):
+                key, extension = os.path.splitext(file_name)
+                if extension == '.tables' and (table is None or table in self._read_tables(key)):
+                    self._remove_files(key)
+                    dropped.add(key)
+        with self._lock:
+            self.stats.invalidations += len(dropped)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _put(self, key: str, tables: typing.FrozenSet[str], df: pd.DataFrame) -> None:
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if key in self._entries:
+            self._remove(key)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = _Entry(df=df, tables=tables, nbytes=nbytes, created=time.monotonic())
+        self.nbytes += nbytes
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        self.nbytes -= self._entries.pop(key).nbytes
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, key + extension)
+
+    def _read_tables(self, key: str) -> typing.FrozenSet[str]:
+        with open(self._path(key, '.tables')) as file:
+            return frozenset(file.read().split('\n'))
+
+    def _remove_files(self, key: str) -> None:
+        for extension in ('.parquet', '.tables'):
+            try:
+                os.remove(self._path(key, extension))
+            except FileNotFoundError:
+                pass
+
+    def _read_disk(self, key: str) -> typing.Optional[typing.Tuple[typing.FrozenSet[str], pd.DataFrame]]:
+        if self.directory is None:
+            return None
+        try:
+            if self._expired(os.path.getmtime(self._path(key, '.parquet')), time.time()):
+                self._remove_files(key)
+                return None
+            return self._read_tables(key), pd.read_parquet(self._path(key, '.parquet'))
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,92 @@
+"""
+Constraints of the fields evaluated as boolean masks by DataFrame.check_constraints()
+"""
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# field arguments checked on the dataframe, only nullable is also given to the sqlalchemy column
+CONSTRAINT_ARGUMENTS = ('nullable', 'min', 'max', 'choices', 'regex')
+
+
+def to_mask(result: pd.Series) -> np.ndarray:
+    """
+    Boolean numpy array of a comparison, the missing values (nullable dtypes) are not violations
+    """
+    return result.to_numpy(dtype=bool, na_value=False)
+
+
+def field_violations(series: pd.Series, constraints: typing.Mapping[str, typing.Any]) -> typing.Dict[str, np.ndarray]:
+    """
+    Mask of the offending rows of series per declared constraint
+    """
+    masks = {}
+    if constraints.get('nullable') is False:
+        masks['nullable'] = series.isna().to_numpy()
+    if constraints.get('min') is not None:
+        masks['min'] = to_mask(series < constraints['min'])
+    if constraints.get('max') is not None:
+        masks['max'] = to_mask(series > constraints['max'])
+    if constraints.get('choices') is not None:
+        masks['choices'] = to_mask(~series.isin(list(constraints['choices'])) & series.notna())
+    if constraints.get('regex') is not None:
+        masks['regex'] = regex_violations(series, constraints['regex'])
+    return masks
+
+
+def regex_violations(series: pd.Series, regex: str) -> np.ndarray:
+    """
+    The regex only runs on the distinct values
+    """
+    codes, uniques = pd.factorize(series)
+    matches = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.fullmatch(regex).to_numpy(dtype=bool)
+    # code -1 (a missing value) takes the True appended at the end
+    return ~np.append(matches, True)[codes]
+
+
+@dataclass
+class ConstraintReport:
+    rows: int
+    # rule ("age.min", "name.nullable", "unique"...) => positions of the offending rows
+    violations: typing.Dict[str, np.ndarray]
+    # rows breaking at least one rule
+    invalid_mask: np.ndarray
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.violations
+
+    @property
+    def invalid_rows(self) -> int:
+        return int(self.invalid_mask.sum())
+
+    def counts(self) -> pd.Series:
+        return pd.Series({rule: len(positions) for rule, positions in self.violations.items()}, dtype='int64')
+
+    def __repr__(self):
+        counts = ''.join(f', {rule}={len(positions)}' for rule, positions in self.violations.items())
+        return f'ConstraintReport(rows={self.rows}, invalid={self.invalid_rows}{counts})'
+
+
+def check(df: pd.DataFrame, constrained_fields: typing.Sequence[typing.Tuple[str, typing.Mapping]],
+          unique_names: typing.Optional[typing.List[str]] = None) -> ConstraintReport:
+    """
+    Evaluate the constraints of the fields present in df and the uniqueness of unique_names
+    """
+    violations = {}
+    invalid_mask = np.zeros(len(df), dtype=bool)
+    for name, constraints in constrained_fields:
+        if name not in df:
+            continue
+        for rule, mask in field_violations(df[name], constraints).items():
+            if mask.any():
+                violations[f'{name}.{rule}'] = np.flatnonzero(mask)
+                invalid_mask |= mask
+    if unique_names and all(name in df for name in unique_names):
+        mask = df.duplicated(subset=unique_names, keep=False).to_numpy()
+        if mask.any():
+            violations['unique'] = np.flatnonzero(mask)
+            invalid_mask |= mask
+    return ConstraintReport(rows=len(df), violations=violations, invalid_mask=invalid_mask)
@@ -0,0 +1,152 @@
+"""
+Datasets of csv files (a glob, a directory or a list of paths), optionally Hive partitioned
+"""
+import glob
+import os
+import typing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from ._pipeline import _model_reference, _resolve_model
+
+GLOB_CHARACTERS = ('*', '?', '[')
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.csv.bz2', '.csv.zip', '.csv.xz', '.tsv', '.txt')
+
+
+def is_dataset(source) -> bool:
+    """
+    True for several paths, a directory or a glob pattern (a single file is read as before)
+    """
+    if isinstance(source, (list, tuple)):
+        return True
+    if not isinstance(source, (str, os.PathLike)):
+        return False
+    source = os.fspath(source)
+    return os.path.isdir(source) or (not os.path.exists(source) and any(char in source for char in GLOB_CHARACTERS))
+
+
+def expand_paths(source) -> typing.List[str]:
+    """
+    Sorted csv files of a directory, a glob pattern or a list of these
+    """
+    if isinstance(source, (list, tuple)):
+        return [path for item in source for path in expand_paths(item)]
+    source = os.fspath(source)
+    if os.path.isdir(source):
+        paths = [os.path.join(root, file_name) for root, _, file_names in os.walk(source)
+                 for file_name in file_names if file_name.endswith(CSV_EXTENSIONS)]
+    elif any(char in source for char in GLOB_CHARACTERS):
+        paths = [path for path in glob.glob(source, recursive=True) if os.path.isfile(path)]
+    else:
+        paths = [source]
+    return sorted(paths)
+
+
+def hive_partitions(path: str) -> typing.Dict[str, str]:
+    """
+    key => value of the key=value directories of the path
+    """
+    partitions = {}
+    for part in os.path.normpath(os.path.dirname(path)).split(os.sep):
+        key, separator, value = part.partition('=')
+        if separator and key:
+            partitions[key] = value
+    return partitions
+
+
+def _read_file(model_reference: typing.Tuple[str, str], path: str, partitions: typing.Dict[str, str],
+               read_kwargs: dict) -> pd.DataFrame:
+    """
+    Runs in a worker process, returns a plain pandas dataframe (see _pipeline._parse_chunk)
+    """
+    return pd.DataFrame(_resolve_model(model_reference).read_csv_file(path, partitions, **read_kwargs))
+
+
+class CsvDataset:
+    """
+    Read every csv file of a dataset in a pool of worker processes (in the current process when workers is None).
+    With partitioning='hive', the key=value directories of the paths become columns.
+    """
+
+    def __init__(self, model, source, workers: typing.Optional[int] = None, partitioning: typing.Optional[str] = None,
+                 **read_kwargs):
+        if partitioning not in (None, 'hive'):
+            raise ValueError(f'partitioning must be None or "hive", got "{partitioning}"')
+        if read_kwargs.get('chunksize') is not None:
+            raise ValueError('chunksize is not supported with several files, use iterator=True to get one dataframe '
+                             'per file')
+        self.model = model
+        self.model_reference = _model_reference(model) if workers is not None else None
+        self.paths = expand_paths(source)
+        if not self.paths:
+            raise FileNotFoundError(f'No csv file found in {source}')
+        self.workers = workers
+        self.partitioning = partitioning
+        self.read_kwargs = read_kwargs
+
+    def partitions_of(self, path: str) -> typing.Dict[str, str]:
+        return hive_partitions(path) if self.partitioning == 'hive' else {}
+
+    def read(self):
+        """
+        One validated dataframe of all the files, concatenated once
+        """
+        frames, partitions = [], []
+        for path, df in self._frames():
+            frames.append(df)
+            partitions.append(self._extra_partitions(path))
+        df = pd.concat(frames, ignore_index=True)
+        for name, dtype in frames[0].dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and not isinstance(df[name].dtype, pd.CategoricalDtype):
+                # the files have different categories, pandas concatenated them as objects
+                df[name] = union_categoricals([frame[name] for frame in frames])
+        self._attach(df, partitions, [len(frame) for frame in frames])
+        return self.model.wrap(df)
+
+    def __iter__(self) -> typing.Iterator:
+        for path, df in self._frames():
+            df = df.reset_index(drop=True)
+            self._attach(df, [self._extra_partitions(path)], [len(df)])
+            yield self.model.wrap(df)
+
+    def _frames(self) -> typing.Iterator[typing.Tuple[str, pd.DataFrame]]:
+        if self.workers is None:
+            for path in self.paths:
+                yield path, pd.DataFrame(self.model.read_csv_file(path, self.partitions_of(path), **self.read_kwargs))
+            return
+        pending: typing.Deque[typing.Tuple[str, Future]] = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for path in self.paths:
+                if len(pending) >= self.workers:
+                    yield self._collect(pending)
+                pending.append((path, executor.submit(_read_file, self.model_reference, path,
+                                                      self.partitions_of(path), self.read_kwargs)))
+            while pending:
+                yield self._collect(pending)
+
+    @staticmethod
+    def _collect(pending: typing.Deque[typing.Tuple[str, Future]]) -> typing.Tuple[str, pd.DataFrame]:
+        path, future = pending.popleft()
+        return path, future.result()
+
+    def _extra_partitions(self, path: str) -> typing.Dict[str, str]:
+        """
+        Partitions that are not fields of the model (the fields are filled by read_csv_file)
+        """
+        return {key: value for key, value in self.partitions_of(path).items()
+                if key not in self.model.schema.name_by_target}
+
+    @staticmethod
+    def _attach(df: pd.DataFrame, partitions: typing.List[typing.Dict[str, str]], lengths: typing.List[int]) -> None:
+        """
+        Add the partition columns as categoricals
+        """
+        for key in dict.fromkeys(key for file_partitions in partitions for key in file_partitions):
+            values = [file_partitions.get(key) for file_partitions in partitions]
+            categories = sorted({value for value in values if value is not None})
+            codes = np.array([categories.index(value) if value is not None else -1 for value in values])
+            df[key] = pd.Categorical.from_codes(np.repeat(codes, lengths), categories=categories)
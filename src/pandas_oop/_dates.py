@@ -0,0 +1,110 @@
+"""
+Date conversion engine of the DateColumn fields, the parsed values are cached per format
+"""
+import threading
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# distinct raw values kept per format, the cache is emptied when it's full
+MAX_CACHED_VALUES = 100_000
+
+NAT = np.datetime64('NaT', 'ns').view('int64')
+
+
+@dataclass
+class DateCacheInfo:
+    hits: int
+    misses: int
+    size: int
+    inferred_format: typing.Optional[str]
+
+
+class DateParser:
+    """
+    Parser of the date strings of one format (None to infer it), get one with DateParser.for_format()
+    """
+    _parsers: typing.Dict[typing.Optional[str], 'DateParser'] = {}
+    _parsers_lock = threading.Lock()
+
+    def __init__(self, format: typing.Optional[str] = None, max_cached: int = MAX_CACHED_VALUES):
+        self.format = format
+        self.max_cached = max_cached
+        # format guessed from the values when no format is declared
+        self.inferred_format: typing.Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._cache: typing.Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_format(cls, format: typing.Optional[str] = None) -> 'DateParser':
+        with cls._parsers_lock:
+            if format not in cls._parsers:
+                cls._parsers[format] = cls(format)
+            return cls._parsers[format]
+
+    def parse(self, series: pd.Series) -> pd.Series:
+        """
+        series as datetime64[ns], the strings go through the cache
+        """
+        if series.dtype == 'datetime64[ns]':
+            return series
+        if series.dtype != object:
+            return pd.to_datetime(series, format=self.format)
+        codes, uniques = pd.factorize(series)
+        uniques = np.asarray(uniques, dtype=object)
+        if pd.api.types.infer_dtype(uniques, skipna=False) != 'string':
+            return pd.to_datetime(series)
+        values = np.append(self._lookup(uniques), NAT)
+        # code -1 (a missing value) takes the NaT appended at the end
+        return pd.Series(values[codes].view('datetime64[ns]'), index=series.index, name=series.name)
+
+    def cache_info(self) -> DateCacheInfo:
+        return DateCacheInfo(hits=self.hits, misses=self.misses, size=len(self._cache),
+                             inferred_format=self.inferred_format)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    def _lookup(self, uniques: np.ndarray) -> np.ndarray:
+        with self._lock:
+            cache = self._cache
+            unknown = [value for value in uniques if value not in cache]
+            self.hits += len(uniques) - len(unknown)
+            self.misses += len(unknown)
+            parsed = dict(zip(unknown, self._parse_strings(np.array(unknown, dtype=object)).tolist())) \
+                if unknown else {}
+            result = np.fromiter((parsed[value] if value in parsed else cache[value] for value in uniques),
+                                 dtype='int64', count=len(uniques))
+            # evicted after the lookup, the values of this call may be in the old entries
+            if len(cache) + len(parsed) > self.max_cached:
+                cache.clear()
+            cache.update(parsed)
+            return result
+
+    def _parse_strings(self, strings: np.ndarray) -> np.ndarray:
+        """
+        int64 nanoseconds of the strings, with the declared format else the inferred one
+        """
+        if self.format is not None:
+            return pd.to_datetime(strings, format=self.format).asi8
+        if self.inferred_format is not None:
+            try:
+                return pd.to_datetime(strings, format=self.inferred_format).asi8
+            except (ValueError, TypeError):
+                pass
+        inferred_format = guess_datetime_format(strings[0])
+        if inferred_format is not None and inferred_format != self.inferred_format:
+            try:
+                parsed = pd.to_datetime(strings, format=inferred_format).asi8
+                self.inferred_format = inferred_format
+                return parsed
+            except (ValueError, TypeError):
+                pass
+        return pd.to_datetime(strings).asi8
@@ -0,0 +1,108 @@
+"""
+Process-wide registry of SQLAlchemy engines shared by the connections with the same options
+"""
+import threading
+import typing
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+_ENGINES: typing.Dict[tuple, typing.Any] = {}
+_ENGINES_LOCK = threading.Lock()
+_REGISTRY_STATS = {'created': 0, 'reused': 0}
+# options that only a QueuePool accepts
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_use_lifo')
+
+
+def _registry_key(kind: str, con_string, options: dict, sqlite_pragmas: dict) -> tuple:
+    def freeze(mapping):
+        return tuple(sorted((key, repr(value)) for key, value in mapping.items()))
+    # str() of a URL object hides the password, two credentials would share one engine
+    url = make_url(con_string).render_as_string(hide_password=False)
+    return kind, url, freeze(options), freeze(sqlite_pragmas)
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def _engine_options(url, options: dict) -> dict:
+    options = dict(options)
+    if _is_sqlite_file(url) and 'poolclass' not in options and any(name in options for name in QUEUE_POOL_OPTIONS):
+        # sqlalchemy 1.4 doesn't pool sqlite files (NullPool), a pool is only used when pool options are given.
+        # A pooled connection is only used by one thread at a time, so the sqlite3 thread check can be disabled.
+        options['poolclass'] = QueuePool
+        options['connect_args'] = {'check_same_thread': False, **options.get('connect_args', {})}
+    return options
+
+
+def _listen_sqlite_pragmas(engine: Engine, sqlite_pragmas: dict) -> None:
+    if not sqlite_pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def get_engine(con_string, options: typing.Optional[dict] = None,
+               sqlite_pragmas: typing.Optional[dict] = None) -> Engine:
+    """
+    Engine registered for this connection string and these options, created on the first call
+    """
+    options, sqlite_pragmas = options or {}, sqlite_pragmas or {}
+    key = _registry_key('sync', con_string, options, sqlite_pragmas)
+    with _ENGINES_LOCK:
+        if key in _ENGINES:
+            _REGISTRY_STATS['reused'] += 1
+            return _ENGINES[key]
+        engine = create_engine(con_string, **_engine_options(make_url(con_string), options))
+        _listen_sqlite_pragmas(engine, sqlite_pragmas)
+        _ENGINES[key] = engine
+        _REGISTRY_STATS['created'] += 1
+        return engine
+
+
+def get_async_engine(con_string, options: typing.Optional[dict] = None,
+                     sqlite_pragmas: typing.Optional[dict] = None):
+    options, sqlite_pragmas = options or {}, sqlite_pragmas or {}
+    key = _registry_key('async', con_string, options, sqlite_pragmas)
+    with _ENGINES_LOCK:
+        if key in _ENGINES:
+            _REGISTRY_STATS['reused'] += 1
+            return _ENGINES[key]
+        from sqlalchemy.ext.asyncio import create_async_engine
+        engine = create_async_engine(con_string, **options)
+        _listen_sqlite_pragmas(engine.sync_engine, sqlite_pragmas)
+        _ENGINES[key] = engine
+        _REGISTRY_STATS['created'] += 1
+        return engine
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(),
+                     overflow=pool.overflow())
+    return stats
+
+
+def registry_stats() -> dict:
+    with _ENGINES_LOCK:
+        return {'engines': len(_ENGINES), **_REGISTRY_STATS}
+
+
+def dispose_engines() -> None:
+    """
+    Close the pooled connections of every registered engine and empty the registry
+    """
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            if isinstance(engine, Engine):
+                engine.dispose()
+        _ENGINES.clear()
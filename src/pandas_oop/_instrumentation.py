@@ -0,0 +1,210 @@
+"""
+Stage instrumentation of the loads, validations and saves, the events are sent to the registered hooks
+"""
+import threading
+import time
+import tracemalloc
+import typing
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# prefix of the span names, e.g. "pandas_oop.load.read"
+SPAN_PREFIX = 'pandas_oop'
+
+_hooks: typing.List[typing.Callable[['StageEvent'], None]] = []
+_lock = threading.Lock()
+
+
+@dataclass
+class StageEvent:
+    stage: str
+    model: typing.Optional[str]
+    seconds: float
+    # wall clock start, in nanoseconds since the epoch (for the tracers)
+    start_ns: int
+    rows: typing.Optional[int] = None
+    bytes: typing.Optional[int] = None
+    # traced memory allocated during the stage, only when tracemalloc is tracing
+    memory_delta: typing.Optional[int] = None
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def span_name(self) -> str:
+        return f'{SPAN_PREFIX}.{self.stage}'
+
+    @property
+    def end_ns(self) -> int:
+        return self.start_ns + int(self.seconds * 1e9)
+
+
+class _Stage:
+    """
+    Measures one stage, the rows and bytes are given with set()
+    """
+    __slots__ = ('stage', 'model', 'attributes', 'rows', 'bytes', '_start', '_start_ns', '_memory')
+
+    def __init__(self, stage: str, model: typing.Optional[str], attributes: dict):
+        self.stage = stage
+        self.model = model
+        self.attributes = attributes
+        self.rows = None
+        self.bytes = None
+
+    def set(self, frame: typing.Optional[pd.DataFrame] = None, rows: typing.Optional[int] = None,
+            **attributes) -> None:
+        if frame is not None:
+            self.rows = len(frame)
+            self.bytes = int(frame.memory_usage(index=False, deep=False).sum())
+        if rows is not None:
+            self.rows = rows
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> '_Stage':
+        self._memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        seconds = time.perf_counter() - self._start
+        memory_delta = None
+        if self._memory is not None and tracemalloc.is_tracing():
+            memory_delta = tracemalloc.get_traced_memory()[0] - self._memory
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        emit(StageEvent(stage=self.stage, model=self.model, seconds=seconds, start_ns=self._start_ns,
+                        rows=self.rows, bytes=self.bytes, memory_delta=memory_delta, attributes=self.attributes))
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def set(self, frame=None, rows=None, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopStage':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+def stage(name: str, model: typing.Optional[str] = None, **attributes):
+    """
+    Context manager measuring a stage, a no-op without hooks
+    """
+    if not _hooks:
+        return _NOOP_STAGE
+    return _Stage(name, model, attributes)
+
+
+def timed_chunks(name: str, model: typing.Optional[str], chunks: typing.Iterable[pd.DataFrame]) \
+        -> typing.Iterator[pd.DataFrame]:
+    """
+    Yield the chunks of a lazy reader, measuring every chunk
+    """
+    iterator = iter(chunks)
+    while True:
+        with stage(name, model) as measured:
+            chunk = next(iterator, None)
+            if chunk is not None:
+                measured.set(chunk)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def emit(event: StageEvent) -> None:
+    for hook in list(_hooks):
+        hook(event)
+
+
+def add_hook(hook: typing.Callable[[StageEvent], None]) -> typing.Callable[[StageEvent], None]:
+    """
+    Call hook(event) at the end of every stage (usable as a decorator)
+    """
+    with _lock:
+        _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: typing.Callable[[StageEvent], None]) -> None:
+    with _lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+class StageCollector:
+    """
+    Events received while collect_stages() is active
+    """
+
+    def __init__(self):
+        self.events: typing.List[StageEvent] = []
+
+    def __call__(self, event: StageEvent) -> None:
+        self.events.append(event)
+
+    def summary(self) -> pd.DataFrame:
+        columns = ['calls', 'seconds', 'rows', 'bytes', 'memory_delta']
+        if not self.events:
+            return pd.DataFrame(columns=columns)
+        frame = pd.DataFrame({
+            'stage': [event.stage for event in self.events],
+            'seconds': [event.seconds for event in self.events],
+            'rows': [event.rows for event in self.events],
+            'bytes': [event.bytes for event in self.events],
+            'memory_delta': [event.memory_delta for event in self.events],
+        })
+        grouped = frame.groupby('stage', sort=False)
+        summary = grouped.agg(calls=('seconds', 'size'), seconds=('seconds', 'sum'))
+        for column in ('rows', 'bytes', 'memory_delta'):
+            # stays <NA> for the stages that don't measure it
+            summary[column] = grouped[column].sum(min_count=1).astype('Int64')
+        return summary[columns]
+
+
+@contextmanager
+def collect_stages(trace_memory: bool = False) -> typing.Iterator[StageCollector]:
+    """
+    Collect the events of the stages run inside the block, trace_memory=True starts tracemalloc for memory_delta
+    """
+    collector = StageCollector()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    add_hook(collector)
+    try:
+        yield collector
+    finally:
+        remove_hook(collector)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def opentelemetry_hook(tracer=None) -> typing.Callable[[StageEvent], None]:
+    """
+    Hook recording every stage as an OpenTelemetry span (pip install pandas-oop[opentelemetry])
+    """
+    if tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError('opentelemetry-api is required to record the stages as spans: '
+                              'pip install pandas-oop[opentelemetry]') from e
+        tracer = trace.get_tracer(SPAN_PREFIX)
+
+    def hook(event: StageEvent) -> None:
+        attributes = {f'{SPAN_PREFIX}.{name}': value for name, value in event.attributes.items() if value is not None}
+        for name in ('model', 'rows', 'bytes', 'memory_delta'):
+            if getattr(event, name) is not None:
+                attributes[f'{SPAN_PREFIX}.{name}'] = getattr(event, name)
+        span = tracer.start_span(event.span_name, start_time=event.start_ns, attributes=attributes)
+        span.end(end_time=event.end_ns)
+
+    return hook
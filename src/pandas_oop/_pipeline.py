@@ -0,0 +1,204 @@
+"""
+Parallel csv ingestion: chunks parsed and validated in a process pool, written by a single thread
+"""
+import importlib
+import io
+import itertools
+import os
+import queue
+import threading
+import time
+import typing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 100_000
+# the file is split on its raw lines: these read_csv options would be applied to every chunk (or to the bytes of a
+# compressed file)
+UNSUPPORTED_READ_ARGUMENTS = ('header', 'skiprows', 'skipfooter', 'nrows', 'comment', 'compression')
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.zip', '.xz', '.zst', '.tar')
+
+
+@dataclass
+class StageStats:
+    rows: int = 0
+    bytes: int = 0
+    # time spent in the stage (summed over the workers for the parse stage)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class PipelineStats:
+    read: StageStats = field(default_factory=StageStats)
+    parse: StageStats = field(default_factory=StageStats)
+    write: StageStats = field(default_factory=StageStats)
+    chunks: int = 0
+    wall_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.parse.rows / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def _model_reference(model) -> typing.Tuple[str, str]:
+    reference = (model.decorated_class.__module__, model.decorated_class.__qualname__)
+    if _resolve_model(reference) is not model:
+        raise ValueError(f'{reference[1]} must be declared at the top level of the module {reference[0]} '
+                         f'to be used in worker processes')
+    return reference
+
+
+def _resolve_model(reference: typing.Tuple[str, str]):
+    model = importlib.import_module(reference[0])
+    for name in reference[1].split('.'):
+        model = getattr(model, name, None)
+    return model
+
+
+def _parse_chunk(model_reference: typing.Tuple[str, str], raw_chunk: bytes, first_row: int,
+                 read_kwargs: dict) -> typing.Tuple[pd.DataFrame, float]:
+    """
+    Runs in a worker process, returns a plain pandas dataframe
+    """
+    start = time.perf_counter()
+    model = _resolve_model(model_reference)
+    df = pd.DataFrame(model(from_csv=io.BytesIO(raw_chunk), **read_kwargs).validate())
+    df.index = pd.RangeIndex(first_row, first_row + len(df))
+    return df, time.perf_counter() - start
+
+
+class Pipeline:
+    """
+    Parse and validate a csv file in parallel, chunk by chunk (quoted line breaks, compressed files and the options
+    of read_csv in UNSUPPORTED_READ_ARGUMENTS are not supported)
+    """
+
+    def __init__(self, model, from_csv, chunksize: int = DEFAULT_CHUNKSIZE, workers: typing.Optional[int] = None,
+                 ordered: bool = True, max_pending: typing.Optional[int] = None, **read_kwargs):
+        unsupported = [name for name in UNSUPPORTED_READ_ARGUMENTS if name in read_kwargs]
+        if unsupported:
+            raise ValueError(f'{", ".join(unsupported)} not supported when a csv file is read in parallel (workers)')
+        if str(from_csv).lower().endswith(COMPRESSED_SUFFIXES):
+            raise ValueError(f'{from_csv} is compressed, it cannot be read in parallel (workers)')
+        self.model = model
+        self.model_reference = _model_reference(model)
+        self.path = from_csv
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count()
+        self.ordered = ordered
+        self.max_pending = max_pending or 2 * self.workers
+        self.read_kwargs = read_kwargs
+        self.stats = PipelineStats()
+
+    def __iter__(self) -> typing.Iterator:
+        start = time.perf_counter()
+        self.stats = PipelineStats()
+        pending: typing.Deque[Future] = deque()
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            for first_row, raw_chunk in self._read_chunks():
+                while len(pending) >= self.max_pending:
+                    yield self._collect(pending)
+                pending.append(executor.submit(_parse_chunk, self.model_reference, raw_chunk, first_row,
+                                               self.read_kwargs))
+            while pending:
+                yield self._collect(pending)
+        except BaseException:
+            # interrupted (or closed before the end): the chunks not parsed yet are dropped
+            # (cancelled one by one, shutdown(cancel_futures=True) needs python 3.9)
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            raise
+        executor.shutdown()
+        self.stats.wall_seconds = time.perf_counter() - start
+
+    def run(self, sink: typing.Optional[typing.Callable] = None, queue_size: typing.Optional[int] = None,
+            **save_kwargs) -> PipelineStats:
+        """
+        Write every chunk with sink(chunk) (chunk.save by default) in a single writer thread
+        """
+        sink = sink or (lambda chunk: chunk.save(**save_kwargs))
+        chunks = queue.Queue(maxsize=queue_size or self.max_pending)
+        writer_errors = []
+        # set when the run is interrupted, the chunks still queued are not written
+        cancelled = threading.Event()
+        end_of_stream = object()
+
+        def write():
+            while True:
+                chunk = chunks.get()
+                if chunk is end_of_stream:
+                    return
+                if writer_errors or cancelled.is_set():
+                    # keep reading the queue so the parsing never waits on a stopped writer
+                    continue
+                start = time.perf_counter()
+                try:
+                    sink(chunk)
+                except Exception as e:
+                    writer_errors.append(e)
+                    continue
+                except BaseException as e:
+                    # an interrupt raised by the sink (SystemExit...) cancels the run, it's raised again below
+                    cancelled.set()
+                    writer_errors.append(e)
+                    continue
+                self.stats.write.seconds += time.perf_counter() - start
+                self.stats.write.rows += len(chunk)
+
+        writer = threading.Thread(target=write, name='pandas_oop_pipeline_writer', daemon=True)
+        writer.start()
+        try:
+            for chunk in self:
+                if writer_errors:
+                    break
+                chunks.put(chunk)
+        except BaseException:
+            # KeyboardInterrupt...: the pool is cancelled by __iter__, the writer drops what's queued
+            cancelled.set()
+            raise
+        finally:
+            chunks.put(end_of_stream)
+            writer.join()
+        if writer_errors:
+            raise writer_errors[0]
+        return self.stats
+
+    def _read_chunks(self) -> typing.Iterator[typing.Tuple[int, bytes]]:
+        with open(self.path, 'rb') as file:
+            header = file.readline()
+            while True:
+                start = time.perf_counter()
+                lines = list(itertools.islice(file, self.chunksize))
+                if not lines:
+                    return
+                raw_chunk = header + b''.join(lines)
+                self.stats.read.seconds += time.perf_counter() - start
+                self.stats.read.bytes += len(raw_chunk)
+                first_row = self.stats.read.rows
+                self.stats.read.rows += len(lines)
+                yield first_row, raw_chunk
+
+    def _collect(self, pending: typing.Deque[Future]):
+        if self.ordered:
+            future = pending.popleft()
+        else:
+            future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+            pending.remove(future)
+        df, seconds = future.result()
+        self.stats.chunks += 1
+        self.stats.parse.rows += len(df)
+        self.stats.parse.seconds += seconds
+        return self.model.wrap(df)
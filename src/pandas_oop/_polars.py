@@ -0,0 +1,180 @@
+"""
+Polars backend of the models, selected with backend='polars' (pip install pandas-oop[polars])
+"""
+import functools
+import typing
+
+import pandas as pd
+
+from ._arrow import _import_pyarrow, pandas_types
+from .custom_exceptions import ValidationError
+
+SOURCES = ('from_csv', 'from_parquet', 'from_df')
+
+# pandas dtype name (lowercased, so the nullable dtypes map too) => polars dtype name
+POLARS_TYPES = {
+    'int8': 'Int8', 'int16': 'Int16', 'int32': 'Int32', 'int64': 'Int64',
+    'float32': 'Float32', 'float64': 'Float64',
+    'bool': 'Boolean', 'boolean': 'Boolean',
+    'object': 'String', 'string': 'String',
+}
+
+
+def _import_polars():
+    try:
+        import polars
+    except ImportError as e:
+        raise ImportError('polars is required to use backend="polars": pip install pandas-oop[polars]') from e
+    return polars
+
+
+def polars_dtype(dtype):
+    """
+    Polars dtype of a declared pandas dtype
+    """
+    pl = _import_polars()
+    if isinstance(dtype, pd.CategoricalDtype):
+        if dtype.categories is None:
+            return pl.Categorical
+        return pl.Enum([str(category) for category in dtype.categories])
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return pl.Datetime('ns', str(dtype.tz))
+    if isinstance(dtype, pd.ArrowDtype):
+        pa = _import_pyarrow()
+        if pa.types.is_decimal(dtype.pyarrow_dtype):
+            return pl.Decimal(dtype.pyarrow_dtype.precision, dtype.pyarrow_dtype.scale)
+        return pl.from_arrow(pa.array([], type=dtype.pyarrow_dtype)).dtype
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if dtype == 'datetime64[ns]':
+        return pl.Datetime('ns')
+    if dtype.name.lower() not in POLARS_TYPES:
+        raise ValueError(f'The dtype {dtype} has no polars equivalent')
+    return getattr(pl, POLARS_TYPES[dtype.name.lower()])
+
+
+def polars_schema(schema) -> typing.Dict[str, typing.Any]:
+    """
+    field name => polars dtype of the fields of a ModelSchema
+    """
+    return {name: field.polars_dtype() for name, field in zip(schema.names, schema.fields)}
+
+
+def select(lazy, schema, columns: typing.Optional[typing.Sequence[str]] = None):
+    """
+    The declared columns of lazy renamed to the field names, with their polars dtype
+    """
+    pl = _import_polars()
+    source_schema = lazy.collect_schema()
+    expressions = []
+    for column, name, field in zip(columns or schema.target_names, schema.names, schema.fields):
+        expression = pl.col(column)
+        dtype = field.polars_dtype()
+        if source_schema[column] == pl.String and dtype != pl.String:
+            expression = field.polars_parse(expression)
+        elif source_schema[column] != dtype:
+            expression = expression.cast(dtype)
+        expressions.append(expression.alias(name))
+    return lazy.select(expressions)
+
+
+def scan_csv(source, schema, **kwargs):
+    """
+    Lazy frame of a csv file (or a glob)
+    """
+    pl = _import_polars()
+    for name in ('delimiter', 'sep'):
+        if name in kwargs:
+            kwargs['separator'] = kwargs.pop(name)
+    reader_dtypes = {target_name: field.polars_reader_dtype()
+                     for target_name, field in zip(schema.target_names, schema.fields)}
+    kwargs['schema_overrides'] = {**reader_dtypes, **(kwargs.get('schema_overrides') or {})}
+    return select(pl.scan_csv(source, **kwargs), schema)
+
+
+def scan_parquet(source, schema, **kwargs):
+    return select(_import_polars().scan_parquet(source, **kwargs), schema)
+
+
+def from_pandas(df: pd.DataFrame, schema, columns: typing.Optional[typing.Sequence[str]] = None):
+    """
+    Lazy frame of a pandas dataframe
+    """
+    columns = list(columns or schema.target_names)
+    return select(_import_polars().from_pandas(df[columns]).lazy(), schema, columns)
+
+
+class PolarsFrame:
+    """
+    Polars DataFrame (or LazyFrame) of a model, the frames returned by its methods keep the model
+    """
+    __slots__ = ('frame', 'schema', '_wrap')
+
+    def __init__(self, frame, schema, wrap: typing.Callable[[pd.DataFrame], pd.DataFrame]):
+        self.frame = frame
+        self.schema = schema
+        # wraps a pandas dataframe of the declared columns in the dataframe of the model
+        self._wrap = wrap
+
+    @property
+    def is_lazy(self) -> bool:
+        return isinstance(self.frame, _import_polars().LazyFrame)
+
+    def collect(self, **kwargs) -> 'PolarsFrame':
+        """
+        Run the query of a lazy frame
+        """
+        if not self.is_lazy:
+            return self
+        pl = _import_polars()
+        try:
+            return self._keep_model(self.frame.collect(**kwargs))
+        except (pl.exceptions.ComputeError, pl.exceptions.InvalidOperationError) as e:
+            raise ValidationError(f'The source does not match the declared fields: {e}') from e
+
+    def is_valid(self) -> bool:
+        """
+        Every declared column has its polars dtype
+        """
+        schema = self.frame.collect_schema() if self.is_lazy else self.frame.schema
+        return all(schema.get(name) == dtype for name, dtype in polars_schema(self.schema).items())
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        The validated pandas dataframe of the model
+        """
+        # polars converts through arrow (the arrow options are passed along)
+        df = self.collect().frame.to_pandas(split_blocks=True, types_mapper=pandas_types)
+        return self._wrap(df).validate()
+
+    def save(self, *args, **kwargs) -> int:
+        """
+        Save the rows in the table of the model, see DataFrame.save
+        """
+        return self.to_pandas().save(*args, **kwargs)
+
+    def _keep_model(self, result):
+        pl = _import_polars()
+        if isinstance(result, (pl.DataFrame, pl.LazyFrame)):
+            return PolarsFrame(result, self.schema, self._wrap)
+        return result
+
+    def __getattr__(self, name):
+        if name in PolarsFrame.__slots__:
+            raise AttributeError(name)
+        attribute = getattr(self.frame, name)
+        if not callable(attribute):
+            return self._keep_model(attribute)
+
+        @functools.wraps(attribute)
+        def method(*args, **kwargs):
+            return self._keep_model(attribute(*args, **kwargs))
+        return method
+
+    def __getitem__(self, item):
+        return self._keep_model(self.frame[item])
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __repr__(self):
+        return repr(self.frame)
@@ -0,0 +1,129 @@
+"""
+Lazy queries on the table of a model, compiled with its sqlalchemy class
+"""
+import copy
+import typing
+
+from sqlalchemy import func, select
+
+# iterating over a query yields validated dataframes of this number of rows
+DEFAULT_CHUNKSIZE = 10_000
+
+LOOKUPS = {
+    'exact': lambda column, value: column.is_(None) if value is None else column == value,
+    'ne': lambda column, value: column.isnot(None) if value is None else column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'in': lambda column, value: column.in_(list(value)),
+    'not_in': lambda column, value: column.not_in(list(value)),
+    'contains': lambda column, value: column.contains(value, autoescape=True),
+    'startswith': lambda column, value: column.startswith(value, autoescape=True),
+    'endswith': lambda column, value: column.endswith(value, autoescape=True),
+    'isnull': lambda column, value: column.is_(None) if value else column.isnot(None),
+    'between': lambda column, value: column.between(*value),
+}
+
+
+class Query:
+    """
+    Every method returns a new query
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._names = list(model.schema.names)
+        self._where = []
+        self._order_by = []
+        self._limit = None
+        self._offset = None
+
+    def filter(self, **lookups) -> 'Query':
+        """
+        field=value or field__lookup=value (see LOOKUPS), combined with AND
+        """
+        query = self._clone()
+        for key, value in lookups.items():
+            name, _, lookup = key.partition('__')
+            if lookup and lookup not in LOOKUPS:
+                raise ValueError(f'Unknown lookup "{lookup}", use one of {list(LOOKUPS)}')
+            query._where.append(LOOKUPS[lookup or 'exact'](self._column(name), value))
+        return query
+
+    def only(self, *names: str) -> 'Query':
+        """
+        Fetch only these fields (in the declaration order of the model)
+        """
+        for name in names:
+            self._column(name)
+        query = self._clone()
+        query._names = [name for name in self.model.schema.names if name in names]
+        return query
+
+    def order_by(self, *names: str) -> 'Query':
+        """
+        Sort on these fields, descending when the name starts with "-"
+        """
+        query = self._clone()
+        query._order_by = [self._column(name[1:]).desc() if name.startswith('-') else self._column(name).asc()
+                           for name in names]
+        return query
+
+    def limit(self, limit: int) -> 'Query':
+        query = self._clone()
+        query._limit = limit
+        return query
+
+    def offset(self, offset: int) -> 'Query':
+        query = self._clone()
+        query._offset = offset
+        return query
+
+    @property
+    def statement(self):
+        schema = self.model.schema
+        target_by_name = dict(zip(schema.names, schema.target_names))
+        statement = select(*[self._column(name).label(target_by_name[name]) for name in self._names])
+        if self._where:
+            statement = statement.where(*self._where)
+        if self._order_by:
+            statement = statement.order_by(*self._order_by)
+        if self._limit is not None:
+            statement = statement.limit(self._limit)
+        if self._offset is not None:
+            statement = statement.offset(self._offset)
+        return statement
+
+    def all(self):
+        """
+        Run the query, returns a validated custom dataframe with the selected fields
+        """
+        return self.model.read_projection(self.statement, self._names)
+
+    def chunks(self, chunksize: int = DEFAULT_CHUNKSIZE) -> typing.Iterator:
+        """
+        Run the query with a server-side cursor, yields validated custom dataframes of chunksize rows
+        """
+        return self.model.read_projection(self.statement, self._names, chunksize=chunksize)
+
+    def count(self) -> int:
+        statement = select(func.count()).select_from(self.statement.subquery())
+        with self.model.state.sql['con'].sql_engine.connect() as con:
+            return con.execute(statement).scalar()
+
+    def __iter__(self):
+        return self.chunks()
+
+    def __str__(self):
+        return str(self.statement)
+
+    def _column(self, name: str):
+        if name not in self.model.schema.names:
+            raise ValueError(f'{self.model.decorated_class.__name__} has no field "{name}"')
+        return getattr(self.model.sqlalchemy_class, name)
+
+    def _clone(self) -> 'Query':
+        query = copy.copy(self)
+        query._where = list(self._where)
+        return query
@@ -0,0 +1,97 @@
+"""
+Compiled schema of a model, built once when the class is decorated
+"""
+import typing
+from types import MappingProxyType
+
+import pandas as pd
+
+
+class ModelSchema:
+    """
+    Immutable description of the columns of a model (in declaration order)
+    """
+    __slots__ = ('names', 'target_names', 'fields', 'dtypes', 'str_types', 'np_types', 'name_by_target', 'bool_maps',
+                 'compact_types', 'load_converters', 'sql_dumpers', 'sql_dates', 'constrained_fields', '_empty_frame')
+
+    def __init__(self, data_types: list):
+        set_slot = super().__setattr__
+        set_slot('names', tuple(data_type.name for data_type in data_types))
+        set_slot('target_names', tuple(data_type.target_name for data_type in data_types))
+        set_slot('fields', tuple(data_type.col_obj_series for data_type in data_types))
+        set_slot('dtypes', tuple(field.dtype for field in self.fields))
+        set_slot('str_types', tuple(data_type.str_type for data_type in data_types))
+        set_slot('np_types', tuple(data_type.np_type for data_type in data_types))
+        set_slot('name_by_target', MappingProxyType(dict(zip(self.target_names, self.names))))
+        # target name => {raw value: bool} for the bool columns declared with true= and false=
+        set_slot('bool_maps', MappingProxyType({
+            data_type.target_name: MappingProxyType(data_type.col_obj_series.true_or_false)
+            for data_type in data_types
+            if data_type.str_type == 'bool' and getattr(data_type.col_obj_series, 'true_or_false', None) is not None}))
+        # target name => dtype, for the columns declared with a compact representation (categorical, bits...)
+        # that the readers can produce directly
+        set_slot('compact_types', MappingProxyType({
+            data_type.target_name: data_type.col_obj_series.reader_dtype()
+            for data_type in data_types
+            if data_type.str_type != data_type.col_obj_series.default_type
+            and data_type.col_obj_series.reader_dtype() is not None}))
+        # target name => field, for the fields converted when the dataframe is built (mapped bools, decimals...)
+        set_slot('load_converters', MappingProxyType({
+            data_type.target_name: data_type.col_obj_series
+            for data_type in data_types if data_type.col_obj_series.converts_on_load}))
+        # field name => field, for the fields whose values are transformed before being written (decimals, json...)
+        set_slot('sql_dumpers', MappingProxyType({
+            data_type.name: data_type.col_obj_series
+            for data_type in data_types if data_type.col_obj_series.dumps_for_sql}))
+        # target names of the dates parsed by read_sql ('2020-01-02 00:00:00.000000' in sqlite whatever the format)
+        set_slot('sql_dates', tuple(
+            data_type.target_name for data_type in data_types if data_type.col_obj_series.parsed_by_sql_reader))
+        # (field name, constraints) for the fields declared with constraints (nullable=False, min, max...)
+        set_slot('constrained_fields', tuple(
+            (data_type.name, MappingProxyType(data_type.col_obj_series.constraints))
+            for data_type in data_types if data_type.col_obj_series.constraints))
+        set_slot('_empty_frame', pd.DataFrame._from_arrays(
+            [pd.Series(dtype=dtype)._values for dtype in self.dtypes],
+            columns=pd.Index(self.names, dtype=object), index=pd.RangeIndex(0)))
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def empty_manager(self):
+        """
+        Block manager of an empty dataframe with the declared columns and dtypes
+        """
+        return self._empty_frame._mgr.copy(deep=False)
+
+    def select(self, df: pd.DataFrame, names: typing.Optional[typing.Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Declared columns of df (or only names) renamed from their target names to the field names
+        """
+        if names is None:
+            target_names, columns = list(self.target_names), self._empty_frame.columns
+        else:
+            target_names, columns = self.targets_of(names), list(names)
+        selected = df[target_names].copy(deep=False)
+        selected.columns = columns
+        return selected
+
+    def dump_for_sql(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        df with the values transformed for the database writers
+        """
+        names = [name for name in self.sql_dumpers if name in df]
+        if not names:
+            return df
+        dumped = df.copy(deep=False)
+        for name in names:
+            dumped[name] = self.sql_dumpers[name].to_sql_values(df[name])
+        return dumped
+
+    def targets_of(self, names: typing.Sequence[str]) -> typing.List[str]:
+        target_by_name = dict(zip(self.names, self.target_names))
+        return [target_by_name[name] for name in names]
+
+    def __repr__(self):
+        columns = ', '.join(f'{name}: {str_type}' for name, str_type in zip(self.names, self.str_types))
+        return f'{type(self).__name__}({columns})'
+
@@ -0,0 +1,90 @@
+"""
+Snapshots of a dataframe of a model in an Arrow IPC file, with a fingerprint of the model definition
+"""
+import hashlib
+import json
+import os
+import typing
+
+import pandas as pd
+
+from ._arrow import _import_pyarrow, pandas_types
+from .custom_exceptions import ValidationError
+
+# key of the pandas_oop metadata in the arrow schema
+METADATA_KEY = b'pandas_oop'
+FORMAT_VERSION = 1
+
+
+def describe(schema, model: str) -> typing.List[list]:
+    """
+    What the stored columns depend on: the model and its fields
+    """
+    return [[model]] + [[name, target_name, repr(field.dtype), type(field).__name__]
+                        for name, target_name, field in zip(schema.names, schema.target_names, schema.fields)]
+
+
+def fingerprint(description: typing.List[list]) -> str:
+    return hashlib.sha256(json.dumps(description).encode()).hexdigest()
+
+
+def _stored_as_text(schema) -> typing.List[str]:
+    # the object columns holding python values (json documents) are stored as their text
+    return [name for name, field in schema.sql_dumpers.items() if field.dtype == object]
+
+
+def write(df: pd.DataFrame, path, schema, model: str) -> None:
+    """
+    Write the declared columns of df in path (through a temporary file)
+    """
+    pa = _import_pyarrow()
+    df = df[list(schema.names)].copy(deep=False)
+    for name in _stored_as_text(schema):
+        df[name] = schema.sql_dumpers[name].to_sql_values(df[name])
+    table = pa.Table.from_pandas(df)
+    description = describe(schema, model)
+    metadata = {'version': FORMAT_VERSION, 'fingerprint': fingerprint(description), 'fields': description}
+    table = table.replace_schema_metadata({**table.schema.metadata, METADATA_KEY: json.dumps(metadata).encode()})
+    temporary_path = f'{os.fspath(path)}.tmp'
+    with pa.OSFile(temporary_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(temporary_path, path)
+
+
+def check(arrow_schema, schema, model: str, path) -> None:
+    """
+    Raise a ValidationError when the snapshot was not taken with the current format and definition of the model
+    """
+    metadata = json.loads((arrow_schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    description = describe(schema, model)
+    if metadata.get('version') == FORMAT_VERSION and metadata.get('fingerprint') == fingerprint(description):
+        return
+    if not metadata:
+        raise ValidationError(f'{path} is not a snapshot of a model')
+    if metadata.get('version') != FORMAT_VERSION:
+        raise ValidationError(f'The snapshot {path} has the format version {metadata.get("version")}, '
+                              f'expected {FORMAT_VERSION}: take it again')
+    stored = {field[0]: field for field in metadata['fields'][1:]}
+    declared = {field[0]: field for field in description[1:]}
+    changes = [name for name in dict.fromkeys([*declared, *stored]) if stored.get(name) != declared.get(name)]
+    if metadata['fields'][0] != description[0]:
+        changes.insert(0, f'model {metadata["fields"][0][0]}')
+    raise ValidationError(f'The snapshot {path} does not match the definition of {model}, '
+                          f'changed: {", ".join(changes)}')
+
+
+def read(path, schema, model: str, memory_map: bool = True) -> pd.DataFrame:
+    """
+    pandas dataframe of a snapshot, the numeric columns are read-only views when memory mapped
+    """
+    pa = _import_pyarrow()
+    source = pa.memory_map(os.fspath(path)) if memory_map else pa.OSFile(os.fspath(path))
+    with source:
+        reader = pa.ipc.open_file(source)
+        check(reader.schema, schema, model, path)
+        table = reader.read_all()
+    # without split_blocks the columns are copied in consolidated (writable) blocks
+    df = table.to_pandas(split_blocks=memory_map, types_mapper=pandas_types)
+    for name in _stored_as_text(schema):
+        df[name] = schema.sql_dumpers[name].convert(df[name])
+    return df
@@ -0,0 +1,68 @@
+"""
+Insert methods given to pandas.DataFrame.to_sql, selected per dialect
+"""
+import io
+import typing
+
+import numpy as np
+
+# rows sent to the database per executemany / COPY
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def _insert_target(table, con, keys) -> typing.Tuple[str, str]:
+    preparer = con.dialect.identifier_preparer
+    return preparer.format_table(table.table), ', '.join(preparer.quote(key) for key in keys)
+
+
+def sqlite_executemany(table, con, keys, data_iter) -> int:
+    """
+    One executemany of a plain driver statement per batch
+    """
+    table_name, columns = _insert_target(table, con, keys)
+    statement = f'INSERT INTO {table_name} ({columns}) VALUES ({", ".join("?" * len(keys))})'
+    data = list(data_iter)
+    con.exec_driver_sql(statement, data)
+    return len(data)
+
+
+def _csv_value(value) -> str:
+    # NULL is an unquoted empty field, every text is quoted (so '' and '\\N' stay texts)
+    if value is None:
+        return ''
+    if isinstance(value, (int, float, np.number)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def postgresql_copy(table, con, keys, data_iter) -> int:
+    """
+    Stream the batch through COPY FROM STDIN using an in memory csv buffer (psycopg2)
+    """
+    table_name, columns = _insert_target(table, con, keys)
+    buffer = io.StringIO()
+    rows = 0
+    for row in data_iter:
+        buffer.write(','.join([_csv_value(value) for value in row]))
+        buffer.write('\n')
+        rows += 1
+    buffer.seek(0)
+    cursor = con.connection.cursor()
+    try:
+        cursor.copy_expert(sql=f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv)", file=buffer)
+    finally:
+        cursor.close()
+    return rows
+
+
+BULK_INSERT_METHODS = {
+    'sqlite': sqlite_executemany,
+    'postgresql': postgresql_copy,
+}
+
+
+def bulk_insert_method(dialect_name: str) -> typing.Optional[typing.Callable]:
+    """
+    Fastest insert method known for the dialect, None (pandas default insert) for the others
+    """
+    return BULK_INSERT_METHODS.get(dialect_name)
@@ -0,0 +1,75 @@
+"""
+Change tracking of a custom dataframe with row hashes keyed by the unique fields
+"""
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, tuple_
+
+from .custom_exceptions import ValidationError
+
+# keys per DELETE statement (stays under the bound parameters limit of sqlite)
+DELETE_BATCH_SIZE = 500
+
+
+@dataclass
+class RowSnapshot:
+    # row hashes indexed by the values of the unique fields
+    hashes: pd.Series
+
+
+@dataclass
+class ChangeSet:
+    inserted: pd.Index
+    updated: pd.Index
+    deleted: pd.Index
+    # positions of the inserted and updated rows in the dataframe
+    dirty_mask: np.ndarray
+
+    @property
+    def is_empty(self) -> bool:
+        return not (len(self.inserted) or len(self.updated) or len(self.deleted))
+
+    def __repr__(self):
+        return f'ChangeSet(inserted={len(self.inserted)}, updated={len(self.updated)}, deleted={len(self.deleted)})'
+
+
+def row_keys(df: pd.DataFrame, index_list: typing.List[str]) -> pd.Index:
+    if len(index_list) == 1:
+        return pd.Index(df[index_list[0]])
+    return pd.MultiIndex.from_frame(df[index_list])
+
+
+def take_snapshot(df: pd.DataFrame, index_list: typing.List[str]) -> RowSnapshot:
+    keys = row_keys(df, index_list)
+    if not keys.is_unique:
+        duplicated = keys[keys.duplicated()].unique().tolist()
+        raise ValidationError(f'The changes can only be tracked on unique values of {", ".join(index_list)}, '
+                              f'duplicated: {duplicated[:10]}')
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(df), index=False)
+    return RowSnapshot(hashes=pd.Series(hashes.values, index=keys))
+
+
+def compare(snapshot: RowSnapshot, df: pd.DataFrame, index_list: typing.List[str]) -> ChangeSet:
+    current = take_snapshot(df, index_list).hashes
+    positions = snapshot.hashes.index.get_indexer(current.index)
+    known = positions >= 0
+    changed = known & (snapshot.hashes.values[positions] != current.values)
+    return ChangeSet(inserted=current.index[~known],
+                     updated=current.index[changed],
+                     deleted=snapshot.hashes.index[~snapshot.hashes.index.isin(current.index)],
+                     dirty_mask=~known | changed)
+
+
+def delete_rows(con, table, index_list: typing.List[str], keys: pd.Index) -> int:
+    if len(index_list) == 1:
+        key_column = table.c[index_list[0]]
+        values = keys.tolist()
+    else:
+        key_column = tuple_(*[table.c[name] for name in index_list])
+        values = [tuple(key) for key in keys]
+    for start in range(0, len(values), DELETE_BATCH_SIZE):
+        con.execute(delete(table).where(key_column.in_(values[start:start + DELETE_BATCH_SIZE])))
+    return len(values)
@@ -0,0 +1,82 @@
+"""
+Batched INSERT ... ON CONFLICT upserts for the dialects that support it, used by DataFrame.save(if_row_exists=...)
+"""
+import typing
+import uuid
+
+import pandas as pd
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ._sql_writers import DEFAULT_BATCH_SIZE, bulk_insert_method
+
+NATIVE_UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+IF_ROW_EXISTS_VALUES = ('update', 'ignore')
+
+
+def upsert_statement(table, con, keys: typing.List[str], index_list: typing.List[str], if_row_exists: str):
+    insert = NATIVE_UPSERT_DIALECTS[con.dialect.name](table)
+    update_columns = [key for key in keys if key not in index_list]
+    if if_row_exists == 'update' and update_columns:
+        return insert.on_conflict_do_update(index_elements=index_list,
+                                            set_={key: insert.excluded[key] for key in update_columns})
+    return insert.on_conflict_do_nothing(index_elements=index_list)
+
+
+def upsert_method(index_list: typing.List[str], if_row_exists: str) -> typing.Callable:
+    """
+    Insert method for pandas.DataFrame.to_sql that upserts every batch with one executemany
+    """
+    def upsert_batch(table, con, keys, data_iter) -> int:
+        statement = upsert_statement(table.table, con, keys, index_list, if_row_exists)
+        data = list(data_iter)
+        if con.dialect.name == 'sqlite':
+            # compiled once, then executed with plain tuples like the bulk insert
+            con.exec_driver_sql(str(statement.compile(dialect=con.dialect, column_keys=keys)), data)
+        else:
+            # psycopg2 runs it with execute_values
+            con.execute(statement, [dict(zip(keys, row)) for row in data])
+        return len(data)
+    return upsert_batch
+
+
+def native_upsert(df: pd.DataFrame, con, table_name: str, table, index_list: typing.List[str],
+                  if_row_exists: str, batch_size: int = DEFAULT_BATCH_SIZE, strategy: str = 'batch') -> int:
+    """
+    Upsert the rows of df in the table, in batches or through a staging table (strategy='staging')
+    """
+    if if_row_exists not in IF_ROW_EXISTS_VALUES:
+        raise ValueError(f'if_row_exists must be one of {IF_ROW_EXISTS_VALUES}, got "{if_row_exists}"')
+    if table is not None:
+        table.create(con, checkfirst=True)
+    if strategy == 'batch':
+        df.to_sql(table_name, con, if_exists='append', index=False, chunksize=batch_size,
+                  method=upsert_method(index_list, if_row_exists))
+        return len(df)
+    if strategy != 'staging':
+        raise ValueError(f'strategy must be "batch" or "staging", got "{strategy}"')
+
+    preparer = con.dialect.identifier_preparer
+    staging_table = f'{table_name}_staging_{uuid.uuid4().hex[:8]}'
+    columns = ', '.join(preparer.quote(column) for column in df.columns)
+    con.exec_driver_sql(f'CREATE TEMPORARY TABLE {preparer.quote(staging_table)} AS '
+                        f'SELECT {columns} FROM {preparer.quote(table_name)} WHERE 1 = 0')
+    try:
+        df.to_sql(staging_table, con, if_exists='append', index=False, chunksize=batch_size,
+                  method=bulk_insert_method(con.dialect.name))
+        update_columns = [column for column in df.columns if column not in index_list]
+        if if_row_exists == 'update' and update_columns:
+            on_conflict = 'DO UPDATE SET ' + ', '.join(f'{preparer.quote(column)} = excluded.{preparer.quote(column)}'
+                                                       for column in update_columns)
+        else:
+            on_conflict = 'DO NOTHING'
+        # "WHERE true" removes the ambiguity between ON CONFLICT and a join constraint in SQLite
+        con.exec_driver_sql(f'INSERT INTO {preparer.quote(table_name)} ({columns}) '
+                            f'SELECT {columns} FROM {preparer.quote(staging_table)} WHERE true '
+                            f'ON CONFLICT ({", ".join(preparer.quote(column) for column in index_list)}) {on_conflict}')
+    finally:
+        con.exec_driver_sql(f'DROP TABLE {preparer.quote(staging_table)}')
+    return len(df)
@@ -1,57 +1,353 @@
+import json
 from copy import copy
 
 import pandas as pd
 import numpy as np
-from sqlalchemy import Column, Text, Integer, Float, Date, Boolean
+from sqlalchemy import Column, Text, Integer, Float, Date, Boolean, DateTime, Enum, JSON, Numeric
+
+from ._arrow import _import_pyarrow
+from ._constraints import CONSTRAINT_ARGUMENTS
+from ._dates import DateParser
+from .custom_exceptions import ValidationError
+from ._polars import _import_polars, polars_dtype
 
 
 class BaseColumn(pd.Series):
-    def __init__(self, base_type, dtype, np_type, **kwargs):
+    """
+    A field of a model, new field types override reader_dtype, convert, matches, needs_load_conversion, is_valid,
+    to_sql_values (and the polars_ methods for backend='polars')
+    """
+    # convert() is an astype: validate() converts all these columns in a single astype pass
+    converts_with_astype = True
+    # the readers can't produce the declared dtype, convert() runs when the dataframe is built
+    converts_on_load = False
+    # to_sql_values() must run before the rows are written
+    dumps_for_sql = False
+    # the databases return the values in their own date format (not the declared one): read_sql parses them
+    parsed_by_sql_reader = False
+
+    def __init__(self, base_type, dtype, np_type, default_type=None, **kwargs):
         super().__init__(dtype=dtype)
-        self.str_type = dtype
+        self.str_type = dtype if isinstance(dtype, str) else str(dtype)
         self.np_type = np_type
         self.base_type = base_type
+        # dtype of the column without the compact options (used by DataFrame.memory_report)
+        self.default_type = default_type or self.str_type
         self.kwargs = copy(kwargs)
 
+    def reader_dtype(self):
+        return self.dtype
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        return series.astype(self.dtype, copy=False)
+
+    def matches(self, series: pd.Series) -> bool:
+        return series.dtype == self.dtype
+
+    def needs_load_conversion(self, series: pd.Series) -> bool:
+        # for the fields converted on load
+        return not self.matches(series)
+
+    def is_valid(self, series: pd.Series) -> bool:
+        return self.base_type in series.dtype.name
+
+    def to_sql_values(self, series: pd.Series) -> pd.Series:
+        return series
+
+    def polars_dtype(self):
+        return polars_dtype(self.dtype)
+
+    def polars_reader_dtype(self):
+        # the fields converted on load are read as text and parsed by polars_parse()
+        return _import_polars().String if self.converts_on_load else self.polars_dtype()
+
+    def polars_parse(self, expression):
+        """
+        Polars expression of the column converted from its text values
+        """
+        return expression.cast(self.polars_dtype())
+
+    @property
+    def constraints(self) -> dict:
+        constraints = {name: self.kwargs[name] for name in CONSTRAINT_ARGUMENTS if self.kwargs.get(name) is not None}
+        if constraints.get('nullable') is not False:
+            # nullable=True only selects a nullable dtype
+            constraints.pop('nullable', None)
+        return constraints
+
     @staticmethod
     def init_sqlalchemy_column(sqlalchemy_col_type, **kwargs):
         kwargs['primary_key'] = kwargs.pop('unique', None)
         kwargs.pop('target_name', None)
+        for name in CONSTRAINT_ARGUMENTS:
+            if name != 'nullable':
+                kwargs.pop(name, None)
         return Column(sqlalchemy_col_type, **kwargs)
 
 
 class StringColumn(BaseColumn):
+    """
+    categorical=True stores the column as a pandas category (for repeated values),
+    storage='pyarrow' (or 'python') stores it as a pandas string dtype
+    """
     def __init__(self, **kwargs):
-        super().__init__(base_type='object', dtype='object', np_type=np.str_, **kwargs)
+        if kwargs.get('categorical'):
+            base_type, dtype = 'category', 'category'
+        elif kwargs.get('storage') is not None:
+            base_type, dtype = 'string', f"string[{kwargs.get('storage')}]"
+        else:
+            base_type, dtype = 'object', 'object'
+        super().__init__(base_type=base_type, dtype=dtype, np_type=np.str_, default_type='object', **kwargs)
+        kwargs.pop('categorical', None)
+        kwargs.pop('storage', None)
         self.sqlalchemy_column = self.init_sqlalchemy_column(Text, **kwargs)
 
 
 class IntegerColumn(BaseColumn):
+    """
+    bits=8, 16 or 32 downcasts the column, nullable=True uses the pandas nullable integer dtype (Int64...)
+    """
     def __init__(self, **kwargs):
-        super().__init__(base_type='int', dtype='int64', np_type=np.int64, **kwargs)
+        bits = kwargs.get('bits', 64)
+        if bits not in (8, 16, 32, 64):
+            raise ValueError(f'bits must be 8, 16, 32 or 64, got {bits}')
+        if kwargs.get('nullable') is True:
+            base_type, dtype = 'Int', f'Int{bits}'
+        else:
+            base_type, dtype = 'int', f'int{bits}'
+        super().__init__(base_type=base_type, dtype=dtype, np_type=getattr(np, f'int{bits}'), default_type='int64',
+                         **kwargs)
+        self.bits = bits
+        self.nullable = kwargs.get('nullable') is True
+        # read as a nullable 64 bits integer (an empty cell doesn't fail the parser) and converted by convert(),
+        # astype would wrap the values out of range of a downcast column
+        self.converts_with_astype = bits == 64
+        self.converts_on_load = bits != 64 or not self.nullable
+        kwargs.pop('bits', None)
         self.sqlalchemy_column = self.init_sqlalchemy_column(Integer, **kwargs)
 
+    def reader_dtype(self):
+        return 'Int64'
+
+    def polars_reader_dtype(self):
+        return polars_dtype(self.reader_dtype())
+
+    def needs_load_conversion(self, series: pd.Series) -> bool:
+        # the columns of the readers and the rows of from_iterator, the other dtypes are converted by validate()
+        return not self.matches(series) and (series.dtype == object or series.dtype == self.reader_dtype()
+                                             or pd.api.types.is_integer_dtype(series.dtype))
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            series = series.astype(self.reader_dtype())
+        if not self.nullable and series.hasnans:
+            # like the inference of pandas, a column with missing values stays float (is_valid() reports it)
+            return series.astype('float64')
+        if self.bits != 64:
+            limits = np.iinfo(self.np_type)
+            if series.notna().any() and (series.min() < limits.min or series.max() > limits.max):
+                raise ValidationError(f'The values of {series.name} are out of the range of {self.dtype} '
+                                      f'[{limits.min}, {limits.max}]')
+        return super().convert(series)
+
 
 class FloatColumn(BaseColumn):
+    """
+    bits=32 stores the column as float32
+    """
     def __init__(self, **kwargs):
-        super().__init__(base_type='float', dtype='float64', np_type=np.float64, **kwargs)
+        bits = kwargs.get('bits', 64)
+        if bits not in (32, 64):
+            raise ValueError(f'bits must be 32 or 64, got {bits}')
+        super().__init__(base_type='float', dtype=f'float{bits}', np_type=getattr(np, f'float{bits}'),
+                         default_type='float64', **kwargs)
+        kwargs.pop('bits', None)
         self.sqlalchemy_column = self.init_sqlalchemy_column(Float, **kwargs)
 
 
 class DateColumn(BaseColumn):
+    """
+    Converted by the date engine (see _dates.DateParser), a value that doesn't match the declared format raises
+    """
+    converts_with_astype = False
+    converts_on_load = True
+    parsed_by_sql_reader = True
+
     def __init__(self, **kwargs):
         super().__init__(base_type='datetime', dtype='datetime64[ns]', np_type=np.datetime64, **kwargs)
+        self.parser = DateParser.for_format(kwargs.get('format'))
         if kwargs.get('format') is not None:
             del kwargs['format']
         self.sqlalchemy_column = self.init_sqlalchemy_column(Date, **kwargs)
 
+    def reader_dtype(self):
+        return object
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        return self.parser.parse(series)
+
+    def polars_parse(self, expression):
+        # like the date engine, a declared format is strict, without one the values that can't be parsed are null
+        return expression.str.to_datetime(self.parser.format, time_unit='ns', strict=self.parser.format is not None)
+
 
 class BoolColumn(BaseColumn):
+    """
+    true= and false= give the raw values of the column, they are mapped when the dataframe is built
+    """
     def __init__(self, **kwargs):
         super().__init__(base_type='bool', dtype='bool', np_type=np.bool_, **kwargs)
         self.true_or_false = None
         if kwargs.get('true') is not None and kwargs.get('false') is not None:
             self.true_or_false = {kwargs.get('true'): True, kwargs.get('false'): False}
+            self.converts_on_load = True
             del kwargs['true']
             del kwargs['false']
         self.sqlalchemy_column = self.init_sqlalchemy_column(Boolean, **kwargs)
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        if self.true_or_false is not None and series.dtype != bool:
+            return series.map(self.true_or_false)
+        return series.astype(bool, copy=False)
+
+    def polars_parse(self, expression):
+        if self.true_or_false is None:
+            return super().polars_parse(expression)
+        pl = _import_polars()
+        mapping = {str(value): boolean for value, boolean in self.true_or_false.items()}
+        return expression.replace_strict(mapping, default=None, return_dtype=pl.Boolean)
+
+
+class CategoryColumn(BaseColumn):
+    """
+    pandas category with a fixed set of categories, the values outside the categories become NaN
+    """
+    def __init__(self, **kwargs):
+        categories = kwargs.get('categories')
+        dtype = pd.CategoricalDtype(categories=categories, ordered=kwargs.get('ordered', False))
+        super().__init__(base_type='category', dtype=dtype, np_type=np.str_, default_type='object', **kwargs)
+        kwargs.pop('categories', None)
+        kwargs.pop('ordered', None)
+        sqlalchemy_type = Enum(*categories, native_enum=False) if categories is not None else Text
+        self.sqlalchemy_column = self.init_sqlalchemy_column(sqlalchemy_type, **kwargs)
+
+    def matches(self, series: pd.Series) -> bool:
+        return isinstance(series.dtype, pd.CategoricalDtype) and series.dtype == self.dtype
+
+    def is_valid(self, series: pd.Series) -> bool:
+        return self.matches(series)
+
+    def polars_reader_dtype(self):
+        return _import_polars().String
+
+    def polars_parse(self, expression):
+        # values outside the categories become null, like in pandas
+        return expression.cast(self.polars_dtype(), strict=False)
+
+
+class DecimalColumn(BaseColumn):
+    """
+    Exact decimal numbers in an arrow decimal128 column (pip install pandas-oop[pyarrow])
+    """
+    converts_with_astype = False
+    converts_on_load = True
+    dumps_for_sql = True
+
+    def __init__(self, **kwargs):
+        pa = _import_pyarrow()
+        precision, scale = kwargs.get('precision', 18), kwargs.get('scale', 2)
+        arrow_type = pa.decimal128(precision, scale)
+        super().__init__(base_type='decimal', dtype=pd.ArrowDtype(arrow_type), np_type=object, default_type='object',
+                         **kwargs)
+        self.arrow_type = arrow_type
+        kwargs.pop('precision', None)
+        kwargs.pop('scale', None)
+        self.sqlalchemy_column = self.init_sqlalchemy_column(Numeric(precision, scale), **kwargs)
+
+    def reader_dtype(self):
+        return None
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        pa = _import_pyarrow()
+        values = pa.array(series, from_pandas=True)
+        if pa.types.is_integer(values.type):
+            # the direct cast needs a precision large enough for any int64
+            values = values.cast(pa.decimal128(38, self.arrow_type.scale))
+        return pd.Series(values.cast(self.arrow_type).to_pandas(types_mapper=pd.ArrowDtype), index=series.index,
+                         name=series.name)
+
+    def to_sql_values(self, series: pd.Series) -> pd.Series:
+        pa = _import_pyarrow()
+        return pd.Series(pa.array(series).cast(pa.string()).to_pandas(), index=series.index, name=series.name)
+
+
+class TimestampTZColumn(BaseColumn):
+    """
+    Timezone aware timestamps, converted to tz (UTC by default). Values without an offset are taken as UTC.
+    """
+    converts_with_astype = False
+    converts_on_load = True
+
+    def __init__(self, **kwargs):
+        tz = kwargs.get('tz', 'UTC')
+        super().__init__(base_type='datetime', dtype=pd.DatetimeTZDtype(tz=tz), np_type=object,
+                         default_type='datetime64[ns]', **kwargs)
+        self.tz = tz
+        kwargs.pop('tz', None)
+        kwargs.pop('format', None)
+        self.sqlalchemy_column = self.init_sqlalchemy_column(DateTime(timezone=True), **kwargs)
+
+    def reader_dtype(self):
+        return None
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        return pd.to_datetime(series, utc=True, format=self.kwargs.get('format')).dt.tz_convert(self.tz)
+
+    def polars_parse(self, expression):
+        return expression.str.to_datetime(self.kwargs.get('format'), time_unit='ns', time_zone='UTC') \
+            .dt.convert_time_zone(self.tz)
+
+    def is_valid(self, series: pd.Series) -> bool:
+        return self.matches(series)
+
+
+class JSONColumn(BaseColumn):
+    """
+    JSON documents (dicts, lists...) in an object column, stored as JSON text
+    """
+    converts_with_astype = False
+    converts_on_load = True
+    dumps_for_sql = True
+
+    def __init__(self, **kwargs):
+        super().__init__(base_type='object', dtype='object', np_type=object, **kwargs)
+        self.sqlalchemy_column = self.init_sqlalchemy_column(JSON, **kwargs)
+
+    def reader_dtype(self):
+        return None
+
+    def convert(self, series: pd.Series) -> pd.Series:
+        values = series.to_numpy(dtype=object, copy=True)
+        present = pd.notna(values)
+        values[~present] = None
+        texts = values[present]
+        if pd.api.types.infer_dtype(texts, skipna=False) == 'string':
+            parsed = json.loads(f'[{",".join(texts)}]')
+            if len(parsed) != len(texts):
+                # a text holding several documents, parse them one by one to raise on it
+                parsed = [json.loads(text) for text in texts]
+        else:
+            parsed = [json.loads(value) if isinstance(value, str) else value for value in texts]
+        values[present] = np.fromiter(parsed, dtype=object, count=len(parsed))
+        return pd.Series(values, index=series.index, name=series.name)
+
+    def matches(self, series: pd.Series) -> bool:
+        return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) != 'string'
+
+    def polars_parse(self, expression):
+        # polars keeps the texts, they are parsed by the conversion to pandas
+        return expression
+
+    def to_sql_values(self, series: pd.Series) -> pd.Series:
+        return pd.Series([None if value is None else json.dumps(value) for value in series.to_numpy(dtype=object)],
+                         index=series.index, name=series.name, dtype=object)
@@ -1,82 +1,358 @@
-from dataclasses import dataclass
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from types import GeneratorType
 from typing import List
 import logging
+import pickle
+import time
 
 import pandas as pd
-from pandas._typing import NDFrameT
+from pandas.core.generic import NDFrame
 from pandas.io.parsers.readers import TextFileReader
 from pangres import upsert
 import numpy as np
 import typing
 
-from sqlalchemy import create_engine
-
-from ._decorators import _decorate_all_methods, _return_custom_df_on_call, sql
+from sqlalchemy import text
+
+from . import _arrow, _constraints, _instrumentation, _polars, _snapshot
+from ._builders import ColumnarBuilder
+from ._cache import QueryCache
+from ._datasets import CsvDataset, is_dataset
+from ._constraints import ConstraintReport
+from ._engines import dispose_engines, get_async_engine, get_engine, pool_stats, registry_stats
+from ._instrumentation import StageCollector, StageEvent, collect_stages, opentelemetry_hook
+from ._instrumentation import add_hook as add_stage_hook, remove_hook as remove_stage_hook
+from ._pipeline import Pipeline, PipelineStats, _resolve_model
+from ._polars import PolarsFrame
+from ._query import Query
+from ._schema import ModelSchema
+from ._tracking import ChangeSet, RowSnapshot, compare, delete_rows, take_snapshot
+from ._sql_writers import DEFAULT_BATCH_SIZE, bulk_insert_method
+from ._upsert import NATIVE_UPSERT_DIALECTS, native_upsert
+from ._decorators import sql
 from .custom_exceptions import ValidationError, MissingDecorator, MissingArguments, MissingUniqueField
 from . import Base
 
 
-@dataclass
+# arguments of save(if_row_exists=...) handled by DataFrame.native_upsert
+NATIVE_UPSERT_ARGUMENTS = ('if_row_exists', 'batch_size', 'strategy', 'chunksize', 'connection')
+
+
+@dataclass(frozen=True)
 class DataFrameState:
+    """
+    State of the model shared by reference by all its dataframes, so it's read-only
+    """
     data_types: typing.Optional[list] = None
     index_list: typing.Optional[list] = None
     sql: typing.Optional[dict] = None
     class_name: typing.Optional = None
     decorated_class: typing.Optional = None
     sqlalchemy_class: Base = None
+    schema: typing.Optional[ModelSchema] = None
+
+    def __reduce__(self):
+        # the engine and the fields can't be pickled: the state is pickled as a reference to its model
+        if self.decorated_class is None:
+            return DataFrameState, ()
+        reference = (self.decorated_class.__module__, self.decorated_class.__qualname__)
+        if getattr(_resolve_model(reference), 'state', None) is not self:
+            raise pickle.PicklingError(f'{reference[1]} must be declared at the top level of the module '
+                                       f'{reference[0]} to pickle its dataframes')
+        return _model_state, (reference,)
+
+
+def _model_state(reference: typing.Tuple[str, str]) -> DataFrameState:
+    return _resolve_model(reference).state
 
 
-@_decorate_all_methods(_return_custom_df_on_call)
 class DataFrame(pd.DataFrame):
+    """
+    pandas dataframe of a model, the results of the pandas operations keep the model
+    """
+    _metadata = ['_dataframe_state']
+    # class level defaults: the constructor is the one of pandas
+    _dataframe_state = DataFrameState()
+    __is_valide = False
+    # row hashes taken by track_changes(), not propagated to the results of the operations
+    _row_snapshot: typing.Optional[RowSnapshot] = None
 
-    def __init__(self, from_df: pd.DataFrame = None, from_csv=None, from_sql_query=None, from_iterator=None, chunksize=None):
-        super().__init__()
-        self._dataframe_state = DataFrameState()
-        self.__is_valide = False
+    @property
+    def _constructor(self):
+        return DataFrame
+
+    def __finalize__(self, other, method=None, **kwargs) -> 'DataFrame':
+        """
+        The state of a concat or a merge is taken from its first custom dataframe
+        """
+        super().__finalize__(other, method=method, **kwargs)
+        if method == 'concat':
+            other = next((obj for obj in other.objs if isinstance(obj, DataFrame)), None)
+        elif method == 'merge':
+            other = other.left
+        else:
+            return self
+        if isinstance(other, DataFrame):
+            object.__setattr__(self, '_dataframe_state', other._dataframe_state)
+        return self
 
     def is_valid(self) -> bool:
+        """
+        Check the dtype of every declared column, then the constraints of the fields
+        """
         if self._dataframe_state.data_types is None:
             self.__is_valide = True
             return self.__is_valide
-        try:
-            for data_type in self._dataframe_state.data_types:
-                if data_type.base_type not in self[data_type.name].dtype.name:
-                    raise ValidationError(
-                        f"The column {data_type.name} is not of type {data_type.col_obj_series.dtype}")
-            self.__is_valide = True
-            return self.__is_valide
-        except ValidationError as ve:
-            logging.warning(ve.msg)
+        dtypes = self.dtypes
+        errors = []
+        for data_type in self._dataframe_state.data_types:
+            if data_type.name not in dtypes:
+                errors.append(f"The column {data_type.name} is missing")
+            elif not data_type.col_obj_series.is_valid(self[data_type.name]):
+                errors.append(f"The column {data_type.name} is not of type {data_type.col_obj_series.dtype}")
+        if not errors:
+            report = self.check_constraints()
+            if not report.is_valid:
+                errors.append(f"The constraints of the fields are not respected: {report}")
+        if errors:
+            logging.warning('\n'.join(errors))
             return False
+        self.__is_valide = True
+        return self.__is_valide
+
+    def _model_state(self) -> DataFrameState:
+        # a DataFrame built directly (not through a model) only has the empty class level state
+        if self._dataframe_state.schema is None:
+            raise MissingDecorator('This dataframe has no model, create it with a class decorated with models.Data')
+        return self._dataframe_state
+
+    def check_constraints(self) -> ConstraintReport:
+        """
+        Offending rows of the constraints declared on the fields and of the uniqueness of the unique fields
+        """
+        schema = self._model_state().schema
+        with _instrumentation.stage('validate.constraints', self._dataframe_state.class_name) as measured:
+            report = _constraints.check(self, schema.constrained_fields, self._dataframe_state.index_list)
+            measured.set(rows=len(self), invalid=report.invalid_rows)
+        return report
+
+    def split_valid(self) -> typing.Tuple['DataFrame', 'DataFrame']:
+        """
+        The rows respecting every constraint and the others, as two dataframes of the model
+        """
+        invalid_mask = self.check_constraints().invalid_mask
+        return self[~invalid_mask], self[invalid_mask]
 
     def validate(self, from_class=None) -> 'DataFrame':
+        """
+        Convert the columns whose dtype differs from the declaration, the outcome is kept in validation_report
+        """
         if from_class is not None:
             self._dataframe_state = from_class().dataframe_state
+        self._model_state()
+        dtypes = self.dtypes
+        astype_mapping = {}
+        converted_fields = []
+        report = ValidationReport()
         for data_type in self._dataframe_state.data_types:
-            if data_type.str_type == 'datetime64[ns]':
-                self[data_type.name] = pd.to_datetime(self[data_type.name],
-                                                      format=data_type.col_obj_series.kwargs.get('format'))
+            if data_type.name not in dtypes:
+                continue
+            field = data_type.col_obj_series
+            if field.matches(self[data_type.name]):
+                report.unchanged.append(data_type.name)
+                continue
+            report.converted[data_type.name] = dtypes[data_type.name].name
+            if field.converts_with_astype:
+                astype_mapping[data_type.name] = field.dtype
             else:
-                self[data_type.name] = self[data_type.name].astype(data_type.str_type)
-        self.is_valid()
+                converted_fields.append(data_type)
+
+        if report.converted:
+            model = self._dataframe_state.class_name
+            converted_df = pd.DataFrame(self)
+            if astype_mapping:
+                with _instrumentation.stage('validate.astype', model, columns=len(astype_mapping)) as measured:
+                    converted_df = converted_df.astype(astype_mapping, copy=False)
+                    measured.set(converted_df)
+            for data_type in converted_fields:
+                field = data_type.col_obj_series
+                with _instrumentation.stage('validate.convert', model, column=data_type.name,
+                                            field=type(field).__name__) as measured:
+                    converted_df[data_type.name] = field.convert(converted_df[data_type.name])
+                    measured.set(rows=len(converted_df))
+            self._update_inplace(converted_df)
+        self._validation_report = report
+        self.__is_valide = self.is_valid()
+        return self
+
+    @property
+    def validation_report(self) -> typing.Optional['ValidationReport']:
+        return getattr(self, '_validation_report', None)
+
+    def to_parquet(self, path=None, **kwargs):
+        """
+        pandas.DataFrame.to_parquet with the declared columns named by their target name
+        """
+        return pd.DataFrame.to_parquet(self._with_target_names(), path, **kwargs)
+
+    def to_feather(self, path, **kwargs):
+        """
+        pandas.DataFrame.to_feather with the declared columns named by their target name
+        """
+        return pd.DataFrame.to_feather(self._with_target_names(), path, **kwargs)
+
+    def snapshot(self, path) -> None:
+        """
+        Write the declared columns in an Arrow IPC file, read back with Model(from_snapshot=path)
+        """
+        state = self._model_state()
+        _snapshot.write(self, path, state.schema, state.decorated_class.__name__)
+
+    def to_polars(self) -> PolarsFrame:
+        """
+        Polars frame of the model, converted through arrow (pip install pandas-oop[polars])
+        """
+        state = self._model_state()
+        frame = _polars.from_pandas(self, state.schema, columns=state.schema.names).collect()
+        return PolarsFrame(frame, state.schema, partial(DataFrame._wrap, state=state))
+
+    def _with_target_names(self) -> pd.DataFrame:
+        schema = self._dataframe_state.schema
+        if schema is None or schema.names == schema.target_names:
+            return pd.DataFrame(self)
+        return pd.DataFrame(self).rename(columns=dict(zip(schema.names, schema.target_names)))
+
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Bytes used by every column compared to the default representation of the field
+        """
+        default_types = {data_type.name: getattr(data_type.col_obj_series, 'default_type', data_type.str_type)
+                         for data_type in self._dataframe_state.data_types or []}
+        rows = {}
+        for name, series in self.items():
+            default_type = np.dtype(default_types[name]) if name in default_types else series.dtype
+            memory = series.memory_usage(index=False, deep=True)
+            if default_type.kind == 'O':
+                default_memory = series.astype(object).memory_usage(index=False, deep=True)
+            else:
+                default_memory = len(series) * default_type.itemsize
+            rows[name] = {'dtype': series.dtype.name, 'bytes': memory,
+                          'default_dtype': default_type.name, 'default_bytes': default_memory}
+        report = pd.DataFrame.from_dict(rows, orient='index',
+                                        columns=['dtype', 'bytes', 'default_dtype', 'default_bytes'])
+        report.loc['total'] = ['', report['bytes'].sum(), '', report['default_bytes'].sum()]
+        report['saved_bytes'] = report['default_bytes'] - report['bytes']
+        report['saved_ratio'] = (report['saved_bytes'] / report['default_bytes'].where(report['default_bytes'] > 0)) \
+            .fillna(0.0).round(3)
+        return report
+
+    def track_changes(self) -> 'DataFrame':
+        """
+        From now on, save() only writes the rows that were inserted or modified
+        """
+        if not self._model_state().index_list:
+            raise MissingUniqueField('Your class must contain one or multiple fields with the parameter "unique=True"')
+        self._row_snapshot = take_snapshot(self, self._dataframe_state.index_list)
         return self
 
+    def changes(self) -> ChangeSet:
+        """
+        Keys of the rows inserted, updated and deleted since track_changes()
+        """
+        if self._row_snapshot is None:
+            raise ValueError('The changes are not tracked, call track_changes() first')
+        return compare(self._row_snapshot, self, self._dataframe_state.index_list)
+
     def save(self, *args, **kwargs) -> int:
+        """
+        Save the rows in the table of the model, with connection=... inside its current transaction
+        """
+        if self._row_snapshot is not None:
+            return self._save_changes(*args, **kwargs)
         self.is_valid()
         self.is_sql_decorator_missing()
+        start = time.perf_counter()
+        with _instrumentation.stage('save.write', self._dataframe_state.class_name) as measured:
+            result, writer = self._write(*args, **kwargs)
+            measured.set(self, writer=writer)
+        self._after_save(start, writer=writer)
+        return result
+
+    def _write(self, *args, **kwargs) -> typing.Tuple[int, str]:
+        """
+        Write the rows with the writer chosen by save(), returns the result and the name of the writer
+        """
+        schema = self._dataframe_state.schema
+        rows = self if schema is None or not schema.sql_dumpers \
+            else DataFrame._wrap(schema.dump_for_sql(pd.DataFrame(self)), self._dataframe_state)
         if kwargs.get("if_row_exists") is not None:
             if self._dataframe_state.index_list is None or not self._dataframe_state.index_list:
                 raise MissingUniqueField(
                     'Your class must contain one or multiple fields with the parameter "unique=True"')
-            return upsert(df=self.set_index(self._dataframe_state.index_list),
-                          con=self.sql_engine,
-                          table_name=self.sql_table, **kwargs)
-        return self.normal_save(*args, **kwargs)
+            # the options of pangres (create_table, add_new_columns...) are left to pangres
+            if kwargs.pop('upsert_engine', None) != 'pangres' \
+                    and self.sql_engine.dialect.name in NATIVE_UPSERT_DIALECTS \
+                    and set(kwargs) <= set(NATIVE_UPSERT_ARGUMENTS):
+                return rows.native_upsert(**kwargs), f"{kwargs.get('strategy', 'batch')}_upsert"
+            return upsert(df=rows.set_index(self._dataframe_state.index_list),
+                          con=kwargs.pop('connection', None) or self.sql_engine,
+                          table_name=self.sql_table, **kwargs), 'pangres_upsert'
+        result = rows.normal_save(*args, **kwargs)
+        return result, (getattr(kwargs.get('method'), '__name__', None)
+                        or getattr(bulk_insert_method(self.sql_engine.dialect.name), '__name__', 'to_sql'))
+
+    def _save_changes(self, *args, delete_missing: bool = False, **kwargs) -> int:
+        """
+        Save the inserted and updated rows (and delete the removed ones with delete_missing=True)
+        """
+        start = time.perf_counter()
+        with _instrumentation.stage('save.changes', self._dataframe_state.class_name) as measured:
+            changes = self.changes()
+            delta = self[changes.dirty_mask]
+            measured.set(delta, deleted=len(changes.deleted))
+        if len(changes.updated) and kwargs.get('if_row_exists') is None:
+            # a plain insert of the updated rows would fail on (or duplicate) the rows of the table
+            kwargs['if_row_exists'] = 'update'
+        result = 0
+        with self._transaction(kwargs.pop('connection', None)) as con:
+            if len(delta):
+                result = delta.save(*args, connection=con, **kwargs)
+            if delete_missing and len(changes.deleted):
+                delete_rows(con, self._dataframe_state.sqlalchemy_class.__table__, self._dataframe_state.index_list,
+                            changes.deleted)
+                self._invalidate_query_cache()
+        self.track_changes()
+        self._save_stats = SaveStats(rows=len(delta), seconds=time.perf_counter() - start,
+                                     writer=delta.save_stats.writer if delta.save_stats else 'tracked_changes')
+        return result
+
+    def native_upsert(self, if_row_exists: str, batch_size: int = DEFAULT_BATCH_SIZE, strategy: str = 'batch',
+                      chunksize: typing.Optional[int] = None, connection=None) -> int:
+        """
+        Upsert on the unique fields with INSERT ... ON CONFLICT (see _upsert.native_upsert)
+        """
+        with self._transaction(connection) as con:
+            return native_upsert(pd.DataFrame(self), con,
+                                 table_name=self.sql_table,
+                                 table=getattr(self._dataframe_state.sqlalchemy_class, '__table__', None),
+                                 index_list=self._dataframe_state.index_list,
+                                 if_row_exists=if_row_exists,
+                                 batch_size=chunksize or batch_size,
+                                 strategy=strategy)
 
     def normal_save(self, *args, **kwargs) -> int:
+        """
+        Insert the rows with the bulk method of the dialect (see _sql_writers), in batches of batch_size rows
+        """
         kwargs['name'] = self.sql_table
-        with self.sql_engine.connect() as con:
+        batch_size = kwargs.pop('batch_size', DEFAULT_BATCH_SIZE)
+        kwargs.setdefault('chunksize', batch_size)
+        with self._transaction(kwargs.pop('connection', None)) as con:
             kwargs['con'] = con
+            if kwargs.get('method') is None:
+                kwargs['method'] = bulk_insert_method(con.dialect.name)
             if kwargs.get('if_exists') is None:
                 kwargs['if_exists'] = 'append'
             elif kwargs.get('if_exists') == 'replace':
@@ -88,6 +364,36 @@ class DataFrame(pd.DataFrame):
                 return self.set_index(self._dataframe_state.index_list).to_sql(*args, **kwargs)
             return self.to_sql(*args, **kwargs)
 
+    async def asave(self, *args, **kwargs) -> int:
+        """
+        Async version of save(), runs in a transaction of the async engine of the connection
+        """
+        self.is_sql_decorator_missing()
+        async with self.async_sql_engine.begin() as con:
+            return await con.run_sync(lambda sync_con: self.save(*args, connection=sync_con, **kwargs))
+
+    def _transaction(self, connection=None):
+        return nullcontext(connection) if connection is not None else self.sql_engine.begin()
+
+    def _after_save(self, start: float, writer: str) -> None:
+        """
+        Keep the save stats and drop the cached queries of the table
+        """
+        self._invalidate_query_cache()
+        seconds = time.perf_counter() - start
+        self._save_stats = SaveStats(rows=len(self), seconds=seconds, writer=writer)
+        logging.info(f"{self._save_stats.rows} rows saved into {self.sql_table} in {seconds:.3f}s "
+                     f"({self._save_stats.rows_per_second:.0f} rows/s, {writer})")
+
+    def _invalidate_query_cache(self) -> None:
+        query_cache = getattr(self._dataframe_state.sql.get('con'), 'query_cache', None)
+        if query_cache is not None:
+            query_cache.invalidate(self.sql_table)
+
+    @property
+    def save_stats(self) -> typing.Optional['SaveStats']:
+        return getattr(self, '_save_stats', None)
+
     def is_sql_decorator_missing(self) -> None:
         if self._dataframe_state.sql is None:
             raise MissingDecorator("You have to decorate your class with models.sql")
@@ -95,43 +401,30 @@ class DataFrame(pd.DataFrame):
             if self._dataframe_state.sql.get(key) is None:
                 raise MissingArguments("Missing arguments on models.sql decorator")
 
-    def _take_with_is_copy(self, indices, axis=0) -> NDFrameT:
-        """
-        Internal version of the `take` method that sets the `_is_copy`
-        attribute to keep track of the parent dataframe (using in indexing
-        for the SettingWithCopyWarning).
-
-        See the docstring of `take` for full explanation of the parameters.
-        """
-        result = self.generic_overrider(self.take(indices=indices, axis=axis), self)
-        # Maybe set copy if we didn't actually change the index.
-        if not result._get_axis(axis).equals(self._get_axis(axis)):
-            result._set_is_copy(self)
-        return result
-
-    def _slice(self, slobj: slice, axis=0) -> NDFrameT:
+    @classmethod
+    def generic_overrider(cls, df: pd.DataFrame, ct_df: 'DataFrame') -> 'DataFrame':
         """
-        Construct a slice of this container.
-
-        Slicing with this method is *always* positional.
+        Rewrap a pandas result as a custom dataframe, without copying its columns
         """
-        assert isinstance(slobj, slice), type(slobj)
-        axis = self._get_block_manager_axis(axis)
-        result = self._constructor(self._mgr.get_slice(slobj, axis=axis))
-        result = result.__finalize__(self)
+        with _instrumentation.stage('generic_overrider', ct_df.dataframe_state.class_name) as measured:
+            new_custom_df = cls._wrap(df, ct_df.dataframe_state)
+            measured.set(new_custom_df)
+        return new_custom_df
 
-        # this could be a view
-        # but only in a single-dtyped view sliceable case
-        is_copy = axis != 0 or result._is_view
-        result._set_is_copy(self, copy=is_copy)
-        return self.generic_overrider(result, self)
+    @classmethod
+    def _wrap(cls, df: pd.DataFrame, state: DataFrameState) -> 'DataFrame':
+        new_custom_df = cls._from_manager(df._mgr, state)
+        new_custom_df._is_copy = df._is_copy
+        new_custom_df.__finalize__(df)
+        # __finalize__ copies the _metadata of df, which is the state of another model when df is a custom dataframe
+        new_custom_df._dataframe_state = state
+        return new_custom_df
 
     @classmethod
-    def generic_overrider(cls, df: pd.DataFrame, ct_df: 'DataFrame') -> 'DataFrame':
-        new_custom_df = cls()
-        new_custom_df._dataframe_state = ct_df.dataframe_state
-        for col_name in df.columns:
-            new_custom_df[col_name] = df[col_name]
+    def _from_manager(cls, mgr, state: DataFrameState) -> 'DataFrame':
+        new_custom_df = cls.__new__(cls)
+        NDFrame.__init__(new_custom_df, mgr)
+        new_custom_df._dataframe_state = state
         return new_custom_df
 
     @property
@@ -142,6 +435,10 @@ class DataFrame(pd.DataFrame):
     def sql_engine(self):
         return self._dataframe_state.sql.get('con').sql_engine
 
+    @property
+    def async_sql_engine(self):
+        return self._dataframe_state.sql.get('con').async_sql_engine
+
     @property
     def sql_table(self):
         return self._dataframe_state.sql.get('table')
@@ -150,6 +447,28 @@ class DataFrame(pd.DataFrame):
         return self._dataframe_state.class_name
 
 
+@dataclass
+class ValidationReport:
+    # converted column name => dtype before the conversion
+    converted: typing.Dict[str, str] = field(default_factory=dict)
+    unchanged: typing.List[str] = field(default_factory=list)
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.converted
+
+
+@dataclass
+class SaveStats:
+    rows: int
+    seconds: float
+    writer: str
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float('inf')
+
+
 @dataclass
 class DataTypes:
     name: str
@@ -181,6 +500,21 @@ class Data:
             )
             for attr_key, attr_val in self.decorated_class.__dict__.items()
             if not attr_key.startswith('__') and not attr_key.endswith('__')]
+        self.compile_schema()
+
+    def compile_schema(self) -> None:
+        """
+        Precompute the schema and the state shared by the dataframes of the model
+        """
+        self.schema = ModelSchema(self.data_types)
+        self.state = DataFrameState(
+            data_types=self.data_types,
+            index_list=self.index_list,
+            sql=getattr(self, 'sql', None),
+            class_name=self.decorated_class.__name__,
+            decorated_class=self.decorated_class,
+            sqlalchemy_class=self.sqlalchemy_class,
+            schema=self.schema)
 
     """
     Between them is called the sql decorator in the _decorators.py file
@@ -189,6 +523,13 @@ class Data:
         """
         This call function is called in the class instantiation
         """
+        if kwargs.pop('track_changes', False):
+            result = self(*args, **kwargs)
+            if isinstance(result, DataFrame):
+                return result.track_changes()
+            return (chunk.track_changes() for chunk in result)
+        if kwargs.pop('backend', 'pandas') == 'polars':
+            return self._polars_frame(**kwargs)
         self.init_new_custom_df()
 
         if kwargs.get('from_df') is not None:
@@ -197,90 +538,379 @@ class Data:
             return self._validate_from_csv_kwarg(**kwargs)
         if kwargs.get('from_iterator') is not None:
             return self._validate_from_iterator_kwarg(**kwargs)
+        if kwargs.get('from_parquet') is not None:
+            return self._validate_from_arrow_file(kwargs.pop('from_parquet'), file_format='parquet', **kwargs)
+        if kwargs.get('from_feather') is not None:
+            return self._validate_from_arrow_file(kwargs.pop('from_feather'), file_format='feather', **kwargs)
+        if kwargs.get('from_snapshot') is not None:
+            return self._read_snapshot(kwargs.pop('from_snapshot'), **kwargs)
         if kwargs.get('from_sql_query') is not None:
             self.df.is_sql_decorator_missing()
-            with self.df.sql_engine.connect() as con:
-                kwargs['con'] = con
-                return self._validate_from_sql_query_kwarg(**kwargs)
-        for data_type in self.data_types:
-            self.df[data_type.name] = data_type.col_obj_series
+            if kwargs.get('chunksize') is not None:
+                return self._stream_from_sql_query(**kwargs)
+            return self._read_sql_query(use_cache=kwargs.pop('cache', True), **kwargs)
         return self.df
 
+    def _polars_frame(self, lazy: bool = False, **kwargs) -> PolarsFrame:
+        """
+        The source scanned by polars (backend='polars'), collected unless lazy=True, see _polars
+        """
+        if kwargs.get('from_csv') is not None:
+            frame = _polars.scan_csv(kwargs.pop('from_csv'), self.schema, **kwargs)
+        elif kwargs.get('from_parquet') is not None:
+            frame = _polars.scan_parquet(kwargs.pop('from_parquet'), self.schema, **kwargs)
+        elif kwargs.get('from_df') is not None:
+            frame = _polars.from_pandas(kwargs.pop('from_df'), self.schema)
+        else:
+            raise ValueError(f'backend="polars" reads one of {", ".join(_polars.SOURCES)}')
+        frame = PolarsFrame(frame, self.schema, self.wrap)
+        if lazy:
+            return frame
+        with _instrumentation.stage('load.read', self.decorated_class.__name__, source='polars') as measured:
+            frame = frame.collect()
+            measured.set(rows=len(frame))
+        return frame
+
     def _validate_from_csv_kwarg(self, **kwargs) -> DataFrame:
+        if is_dataset(kwargs['from_csv']):
+            return self._read_csv_dataset(**kwargs)
+        if kwargs.get('workers') is not None:
+            # a single file: its chunks are parsed in parallel by a pipeline
+            pipeline = Pipeline(self, kwargs.pop('from_csv'), **kwargs)
+            return iter(pipeline) if kwargs.get('chunksize') is not None else pd.concat(list(pipeline))
         kwargs['filepath_or_buffer'] = kwargs.pop('from_csv')
+        self._add_csv_parser_hints(kwargs)
         return self._validate_kwargs(func=pd.read_csv, **kwargs)
 
+    def _read_csv_dataset(self, from_csv, workers: typing.Optional[int] = None,
+                          partitioning: typing.Optional[str] = None, iterator: bool = False, **kwargs):
+        """
+        Read several csv files (a glob, a directory or a list), in worker processes with workers=N
+        """
+        dataset = CsvDataset(self, from_csv, workers=workers, partitioning=partitioning, **kwargs)
+        return iter(dataset) if iterator else dataset.read()
+
+    def read_csv_file(self, path, partitions: typing.Optional[typing.Mapping[str, str]] = None,
+                      **kwargs) -> DataFrame:
+        """
+        Read and validate one csv file of a dataset, the fields found in partitions take their value
+        """
+        partitions = {target_name: value for target_name, value in (partitions or {}).items()
+                      if target_name in self.schema.name_by_target}
+        kwargs['filepath_or_buffer'] = path
+        kwargs.setdefault('usecols', [target_name for target_name in self.schema.target_names
+                                      if target_name not in partitions])
+        self._add_csv_parser_hints(kwargs)
+        with _instrumentation.stage('load.read', self.decorated_class.__name__, source='read_csv') as measured:
+            df = pd.read_csv(**kwargs)
+            measured.set(df)
+        for target_name, value in partitions.items():
+            df[target_name] = value
+        self.init_new_custom_df()
+        self.build_custom_df(df, self._load_converters())
+        return self.df.validate()
+
+    def _add_csv_parser_hints(self, kwargs) -> None:
+        """
+        Give the declared columns and dtypes to the csv parser (the arguments of the user take precedence)
+        """
+        kwargs.setdefault('usecols', list(self.schema.target_names))
+        dtype = {}
+        true_values = set(kwargs.get('true_values') or [])
+        false_values = set(kwargs.get('false_values') or [])
+        for data_type in self.data_types:
+            reader_dtype = data_type.col_obj_series.reader_dtype()
+            if reader_dtype is None:
+                continue
+            if data_type.str_type == 'bool':
+                true_or_false = data_type.col_obj_series.true_or_false
+                if true_or_false is None or not all(isinstance(value, str) for value in true_or_false):
+                    continue
+                col_true_values = {value for value, boolean in true_or_false.items() if boolean}
+                col_false_values = {value for value, boolean in true_or_false.items() if not boolean}
+                if col_true_values & false_values or col_false_values & true_values:
+                    # true_values / false_values are global to the parser, the mapping is done after parsing
+                    continue
+                true_values |= col_true_values
+                false_values |= col_false_values
+            dtype[data_type.target_name] = reader_dtype
+        if isinstance(kwargs.get('dtype'), dict):
+            dtype.update(kwargs['dtype'])
+        kwargs.setdefault('dtype', dtype)
+        if true_values:
+            kwargs['true_values'] = sorted(true_values)
+        if false_values:
+            kwargs['false_values'] = sorted(false_values)
+
+    def _validate_from_arrow_file(self, source, file_format: str, filters=None, **kwargs) -> DataFrame:
+        """
+        Read the declared columns of a parquet or feather file (filters use the field names)
+        """
+        target_by_name = dict(zip(self.schema.names, self.schema.target_names))
+        with _instrumentation.stage('load.read', self.decorated_class.__name__, source=file_format) as measured:
+            table = _arrow.read_table(source, file_format, columns=list(self.schema.target_names),
+                                      filters=_arrow.translate_filters(filters, target_by_name), **kwargs)
+            matches = _arrow.table_matches(table, self.schema.target_names, self.schema.dtypes)
+            df = table.to_pandas()
+            measured.set(df)
+        self.build_custom_df(df, self.schema.load_converters)
+        return self.df if matches else self.df.validate()
+
+    def _read_snapshot(self, path, memory_map: bool = True) -> DataFrame:
+        """
+        Memory map a snapshot taken with DataFrame.snapshot
+        """
+        with _instrumentation.stage('load.read', self.decorated_class.__name__, source='snapshot') as measured:
+            df = _snapshot.read(path, self.schema, self.decorated_class.__name__, memory_map=memory_map)
+            measured.set(df)
+        self.df = self.wrap(df)
+        return self.df
+
     def _validate_from_sql_query_kwarg(self, **kwargs) -> DataFrame:
         kwargs['sql'] = kwargs.pop('from_sql_query')
+        self._add_sql_dtype_hints(kwargs)
         return self._validate_kwargs(func=pd.read_sql_query, **kwargs)
 
-    def _validate_from_iterator_kwarg(self, **kwargs) -> DataFrame:
-        data = []
-        for row in kwargs.get('from_iterator')():
-            data.append(row)
-        kwargs['columns'] = [data_type.name for data_type in self.data_types]
-        kwargs['data'] = data
-        kwargs.pop('from_iterator')
-        return self._validate_kwargs(func=self.create_df_from_data_and_columns, **kwargs)
-
-    def _validate_kwargs(self, func=None, **kwargs):
-        col_type = {}
-        bool_validator = {}
-        for index, data_type in enumerate(self.data_types):
-
-            if data_type.str_type == 'datetime64[ns]':
-                if 'parse_dates' in kwargs.keys():
-                    kwargs['parse_dates'].append(data_type.target_name)
-                else:
-                    kwargs['parse_dates'] = [data_type.target_name]
-                continue
+    def _add_sql_dtype_hints(self, kwargs, target_names: typing.Optional[typing.List[str]] = None) -> None:
+        """
+        Read the columns declared with a compact representation directly in their dtype, and the dates in the
+        format of the database (the declared format is the one of the files)
+        """
+        compact_types = {target_name: dtype for target_name, dtype in self.schema.compact_types.items()
+                         if target_names is None or target_name in target_names}
+        if compact_types:
+            kwargs['dtype'] = {**compact_types, **(kwargs.get('dtype') or {})}
+        sql_dates = [target_name for target_name in self.schema.sql_dates
+                     if target_names is None or target_name in target_names]
+        if sql_dates:
+            kwargs.setdefault('parse_dates', sql_dates)
+
+    def query(self) -> Query:
+        """
+        Lazy query on the table of the model, see _query.Query
+        """
+        self.init_new_custom_df()
+        self.df.is_sql_decorator_missing()
+        return Query(self)
 
-            if data_type.str_type == 'bool' and data_type.col_obj_series.true_or_false is not None:
-                bool_validator[data_type.name] = data_type.col_obj_series.true_or_false
+    def read_projection(self, statement, names: typing.List[str], chunksize: typing.Optional[int] = None):
+        """
+        Run a select of the given fields and validate the result (an iterator of chunks with a chunksize)
+        """
+        target_names = self.schema.targets_of(names)
+        kwargs = {'sql': statement}
+        self._add_sql_dtype_hints(kwargs, target_names)
+        converters = self._load_converters(target_names)
+        if chunksize is not None:
+            return self._stream_projection(names, converters, chunksize=chunksize, **kwargs)
+        with self.state.sql['con'].sql_engine.connect() as con, \
+                _instrumentation.stage('load.read', self.decorated_class.__name__, source='query') as measured:
+            df = pd.read_sql_query(con=con, **kwargs)
+            measured.set(df)
+        self.build_custom_df(df, converters, names)
+        return self.df.validate()
+
+    def _stream_projection(self, names, converters, **kwargs) -> typing.Iterator[DataFrame]:
+        with self.state.sql['con'].sql_engine.connect() as con:
+            chunks = pd.read_sql_query(con=con.execution_options(stream_results=True), **kwargs)
+            for chunk in _instrumentation.timed_chunks('load.read', self.decorated_class.__name__, chunks):
+                self.build_custom_df(chunk, converters, names)
+                yield self.df.validate()
+
+    def _read_sql_query(self, use_cache: bool = True, **kwargs) -> DataFrame:
+        """
+        Run the query, or take its result from the query cache of the connection if it has one
+        """
+        query_cache = getattr(self.sql['con'], 'query_cache', None) if use_cache else None
+        if query_cache is not None:
+            model_name = f'{self.decorated_class.__module__}.{self.decorated_class.__qualname__}'
+            key = query_cache.key(model_name, kwargs['from_sql_query'],
+                                  {name: value for name, value in kwargs.items() if name != 'from_sql_query'},
+                                  self.df.sql_engine.url)
+            cached = query_cache.get(key)
+            if cached is not None:
+                return DataFrame._wrap(cached, self.state)
+        with self.df.sql_engine.connect() as con:
+            df = self._validate_from_sql_query_kwarg(con=con, **kwargs)
+        if query_cache is not None:
+            query_cache.put(key, query_cache.tables_of(kwargs['from_sql_query'], self.sql['table']), df)
+        return df
+
+    def _stream_from_sql_query(self, **kwargs) -> typing.Iterator[DataFrame]:
+        """
+        Yield a validated custom dataframe per chunk of the query result (server-side cursor)
+        """
+        with self.df.sql_engine.connect() as con:
+            kwargs['con'] = con.execution_options(stream_results=True)
+            for chunk in self._validate_from_sql_query_kwarg(**kwargs):
+                yield chunk.validate()
 
-            col_type[data_type.name] = data_type.np_type
+    def _validate_from_iterator_kwarg(self, **kwargs) -> DataFrame:
+        from_iterator = kwargs.pop('from_iterator')
+        builder = ColumnarBuilder(
+            columns=list(self.schema.target_names),
+            # the integer buffers are safe, the values that don't fit fall back to an object buffer
+            np_types=[object if target_name in self.schema.load_converters and not np.issubdtype(np_type, np.integer)
+                      else np_type for target_name, np_type in zip(self.schema.target_names, self.schema.np_types)],
+            chunksize=kwargs.get('chunksize'))
+        rows = from_iterator() if callable(from_iterator) else from_iterator
+        frames = _instrumentation.timed_chunks('load.read', self.decorated_class.__name__, builder.build(rows))
+        if kwargs.get('chunksize') is None:
+            return self._validate_kwargs(from_df=next(frames))
+        return self.iterator_generator(frames)
+
+    def iterator_generator(self, frames: typing.Iterator[pd.DataFrame]) -> typing.Iterator[DataFrame]:
+        for frame in frames:
+            self.init_new_custom_df()
+            yield self._validate_kwargs(from_df=frame).validate()
+
+    def _validate_kwargs(self, func=None, **kwargs) -> DataFrame:
+        converters = self._load_converters()
         if kwargs.get('from_df') is not None:
             df = kwargs.get('from_df')
         else:
-            df = func(**kwargs)
-        if isinstance(df, TextFileReader):
-            return self.df_generator(df, bool_validator)
-        self.build_custom_df(df, bool_validator)
+            with _instrumentation.stage('load.read', self.decorated_class.__name__, source=func.__name__) as measured:
+                df = func(**kwargs)
+                if isinstance(df, pd.DataFrame):
+                    measured.set(df)
+        if isinstance(df, (TextFileReader, GeneratorType)):
+            return self.df_generator(df, converters)
+        self.build_custom_df(df, converters)
         return self.df
 
-    def df_generator(self, df, bool_validator):
-        for chunk in df:
+    def _load_converters(self, target_names: typing.Optional[typing.List[str]] = None) \
+            -> typing.Mapping[str, typing.Any]:
+        """
+        Fields converted when the dataframe is built, only for the given target names if any
+        """
+        if target_names is None:
+            return self.schema.load_converters
+        return {target_name: field for target_name, field in self.schema.load_converters.items()
+                if target_name in target_names}
+
+    async def aread(self, from_sql_query, **kwargs) -> DataFrame:
+        """
+        Async version of Model(from_sql_query=...), runs on the async engine of the connection
+        """
+        self.init_new_custom_df()
+        self.df.is_sql_decorator_missing()
+        kwargs['sql'] = text(from_sql_query) if isinstance(from_sql_query, str) else from_sql_query
+        self._add_sql_dtype_hints(kwargs)
+        converters = self._load_converters()
+        async with self.df.async_sql_engine.connect() as con:
+            df = await con.run_sync(lambda sync_con: pd.read_sql_query(con=sync_con, **kwargs))
+        # no await from here: concurrent reads of the same model can't interleave while self.df is built
+        self.init_new_custom_df()
+        self.build_custom_df(df, converters)
+        return self.df
+
+    async def astream(self, from_sql_query, chunksize: int, params: typing.Optional[dict] = None) \
+            -> typing.AsyncIterator[DataFrame]:
+        """
+        Async iterator of validated custom dataframes of chunksize rows, fetched with a server-side cursor
+        """
+        self.init_new_custom_df()
+        self.df.is_sql_decorator_missing()
+        converters = self._load_converters()
+        statement = text(from_sql_query) if isinstance(from_sql_query, str) else from_sql_query
+        async with self.df.async_sql_engine.connect() as con:
+            result = await con.stream(statement, params)
+            columns = list(result.keys())
+            async for rows in result.partitions(chunksize):
+                self.init_new_custom_df()
+                self.build_custom_df(pd.DataFrame.from_records(rows, columns=columns), converters)
+                yield self.df.validate()
+
+    def df_generator(self, df, converters):
+        for chunk in _instrumentation.timed_chunks('load.read', self.decorated_class.__name__, df):
             self.init_new_custom_df()
-            self.build_custom_df(chunk, bool_validator)
+            self.build_custom_df(chunk, converters)
             yield self.df
 
-    def build_custom_df(self, df, bool_validator):
-        # Convert bool values
-        for col_name, bool_val_dict in bool_validator.items():
-            df[col_name] = df[col_name].map(bool_val_dict)
+    def build_custom_df(self, df, converters, names: typing.Optional[typing.List[str]] = None):
+        model = self.decorated_class.__name__
+        # Convert the fields the reader can't produce (mapped bools, decimals...), unless it already did
+        converted = [col_name for col_name, field in converters.items() if field.needs_load_conversion(df[col_name])]
+        if converted:
+            with _instrumentation.stage('load.convert', model, columns=len(converted)) as measured:
+                # df can be the dataframe of the caller (from_df=...), its columns are not replaced
+                df = df.copy(deep=False)
+                for col_name in converted:
+                    df[col_name] = converters[col_name].convert(df[col_name])
+                measured.set(rows=len(df))
+
+        with _instrumentation.stage('load.select', model) as measured:
+            self.df = DataFrame._wrap(self.schema.select(df, names), self.state)
+            measured.set(self.df)
+
+    def wrap(self, df: pd.DataFrame) -> DataFrame:
+        """
+        Wrap a dataframe that already has the declared columns, without copying it
+        """
+        return DataFrame._wrap(df, self.state)
 
-        for data_type in self.data_types:
-            self.df[data_type.name] = df[data_type.target_name]
+    def ingest(self, from_csv, sink: typing.Optional[typing.Callable] = None, save_kwargs: typing.Optional[dict] = None,
+               **pipeline_kwargs) -> PipelineStats:
+        """
+        Parse and validate a csv file in parallel and save it (or give it to sink) chunk by chunk, see Pipeline
+        """
+        return Pipeline(self, from_csv, **pipeline_kwargs).run(sink=sink, **(save_kwargs or {}))
 
     def init_new_custom_df(self):
-        self.df = DataFrame()
-        self.df.dataframe_state.decorated_class = self.decorated_class
-        self.df.dataframe_state.class_name = self.decorated_class.__name__
-        self.df.dataframe_state.data_types = self.data_types
-        self.df.dataframe_state.index_list = self.index_list
-        if hasattr(self, 'sql'):
-            self.df.dataframe_state.sql = self.sql
-            self.df.dataframe_state.sql['table'] = self.sql.get('table')
-            self.df.dataframe_state.sqlalchemy_class = self.sqlalchemy_class
-
-    @staticmethod
-    def create_df_from_data_and_columns(**kwargs) -> pd.DataFrame:
-        return pd.DataFrame(data=kwargs.get('data'), columns=kwargs.get('columns'))
+        self.df = DataFrame._from_manager(self.schema.empty_manager(), self.state)
 
 
 class Connection:
-    def __init__(self, con_string):
-        self.sql_engine = create_engine(con_string)
+    """
+    Database of the models, the connections with the same connection string and options share one engine
+    """
+    # async driver used by default for the dialects of the synchronous connection string
+    ASYNC_DRIVERS = {
+        'sqlite': 'sqlite+aiosqlite',
+        'postgresql': 'postgresql+asyncpg',
+        'mysql': 'mysql+aiomysql',
+    }
+
+    def __init__(self, con_string, async_con_string=None, sqlite_pragmas: typing.Optional[dict] = None,
+                 warm_up: int = 0, query_cache: typing.Optional[QueryCache] = None, **engine_options):
+        self.con_string = con_string
+        self.query_cache = query_cache
+        self.async_con_string = async_con_string
+        self.sqlite_pragmas = sqlite_pragmas
+        self.engine_options = engine_options
+        self.sql_engine = get_engine(con_string, engine_options, sqlite_pragmas)
+        if warm_up:
+            self.warm_up(warm_up)
+
+    @property
+    def async_sql_engine(self):
+        """
+        SQLAlchemy async engine (created on first use) for Model.aread / astream and DataFrame.asave
+        """
+        async_con_string = self.async_con_string
+        if async_con_string is None:
+            url = self.sql_engine.url
+            async_con_string = url.set(drivername=self.ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+        return get_async_engine(async_con_string, self.engine_options, self.sqlite_pragmas)
+
+    def warm_up(self, connections: int = 1) -> None:
+        """
+        Open connections up front so that the first queries don't pay for it
+        """
+        opened = [self.sql_engine.connect() for _ in range(connections)]
+        for connection in opened:
+            connection.close()
+
+    def pool_stats(self) -> dict:
+        return pool_stats(self.sql_engine)
+
+    @staticmethod
+    def registry_stats() -> dict:
+        return registry_stats()
+
+    @staticmethod
+    def dispose_all() -> None:
+        dispose_engines()
 
 
 _trust = sql
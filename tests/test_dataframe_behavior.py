@@ -1,12 +1,21 @@
-from unittest import TestCase
+import os
+import pickle
+import tempfile
+from importlib.util import find_spec
+from unittest import TestCase, mock, skipIf
 import pandas as pd
 import numpy as np
 from pandas import Timestamp
 
+from src.pandas_oop import models
+from src.pandas_oop._dates import DateParser
+from src.pandas_oop.custom_exceptions import MissingDecorator, ValidationError
+from src.pandas_oop.fields import IntegerColumn, StringColumn
 from src.pandas_oop.models import DataFrame
 from tests.test_models_declaration import People, PeopleNoTable, PEOPLE_DATA_FILE, PeopleFromDatabase, \
     PeopleFromDatabaseWithoutBoolArgs, PEOPLE2_DATA_FILE, PeopleJobs, UniqueCars, MergedPeople, retrieve_people, \
-    PeopleFromIterator, PeopleDeclaredWithDifferentFields, LOT_OF_PEOPLE_DATA_FILE, PeopleTwoColumns
+    PeopleFromIterator, PeopleDeclaredWithDifferentFields, LOT_OF_PEOPLE_DATA_FILE, PeopleTwoColumns, PeopleCompact, \
+    PeopleWithConstraints
 
 
 class TestDataframeBehavior(TestCase):
@@ -20,6 +29,16 @@ class TestDataframeBehavior(TestCase):
         people_2 = People()
         self.assertIsNot(people_2, people_1)
 
+    def test_empty_instance_is_typed_and_shares_state(self):
+        people_1 = People()
+        people_2 = People()
+        self.assertEqual(people_1.dtypes.tolist(), [np.dtype(str_type) for str_type in People.schema.str_types])
+        self.assertIs(people_1.dataframe_state, people_2.dataframe_state)
+        self.assertIs(people_1.dataframe_state.schema, People.schema)
+        self.assertRaises(AttributeError, setattr, People.schema, 'names', ())
+        people_1['name'] = ['John']
+        self.assertEqual(len(people_2), 0)
+
     def test_dataframe_has_only_declared_columns(self):
         people = PeopleTwoColumns(from_csv=PEOPLE_DATA_FILE, delimiter=";")
         self.assertEqual(['name', 'age'], list(people.columns))
@@ -46,6 +65,116 @@ class TestDataframeBehavior(TestCase):
         self.assertEqual(result, self.expected_result)
         self.assertEqual(people.insertion_date.dtype.type, np.datetime64, "Column is not a date")
 
+    def test_from_csv_parses_declared_dtypes(self):
+        people = PeopleTwoColumns(from_csv=PEOPLE_DATA_FILE, delimiter=";", dtype={'age': 'float64'})
+        self.assertEqual(people.age.dtype, np.float64)
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        self.assertEqual(people.is_staff.dtype, np.bool_)
+
+    def test_from_csv_with_missing_integers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.csv')
+            with open(path, 'w') as file:
+                file.write('name;age\nJohn;15\nSnow;\n')
+            people = PeopleTwoColumns(from_csv=path, delimiter=";")
+        # like pandas, the column with a missing value is read as float
+        self.assertEqual(people.age.dtype, np.float64)
+        self.assertEqual(people.age.iloc[0], 15)
+        self.assertFalse(people.is_valid())
+
+    @skipIf(find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_from_csv_with_pyarrow_engine(self):
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";", engine='pyarrow')
+        self.assertEqual(people.to_dict(), self.expected_result)
+        self.assertTrue(people.is_valid())
+
+    @skipIf(find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_parquet_round_trip_with_filters(self):
+        people = PeopleDeclaredWithDifferentFields(
+            from_df=pd.DataFrame(People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";")))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.parquet')
+            people.to_parquet(path)
+            adults = PeopleDeclaredWithDifferentFields(from_parquet=path, filters=[('age', '>=', 18)])
+        self.assertIsInstance(adults, DataFrame)
+        self.assertEqual(list(adults.columns), list(people.columns))
+        self.assertEqual(adults.to_dict('list'), people[people.age >= 18].reset_index(drop=True).to_dict('list'))
+        self.assertIsNone(adults.validation_report, 'The validation was not skipped with a matching schema')
+
+    @skipIf(find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_from_feather_validates_mismatched_schema(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.feather')
+            data = pd.read_csv(PEOPLE_DATA_FILE, delimiter=";", parse_dates=['insertion_date'])
+            data.astype({'age': 'float64'}).to_feather(path)
+            people = People(from_feather=path)
+        self.assertEqual(people.to_dict(), self.expected_result)
+        self.assertEqual(people.validation_report.converted, {'age': 'float64'})
+
+    @skipIf(find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_snapshot_round_trip(self):
+        people = People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";")
+        adults = people[people.age >= 17]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.arrow')
+            adults.snapshot(path)
+            from_snapshot = People(from_snapshot=path)
+            self.assertIsInstance(from_snapshot, DataFrame)
+            self.assertEqual(from_snapshot.to_dict(), adults.to_dict())
+            self.assertEqual(list(from_snapshot.dtypes), list(people.dtypes))
+            # the numbers are views of the mapped file
+            self.assertFalse(from_snapshot.age.to_numpy().flags.writeable)
+            self.assertTrue(People(from_snapshot=path, memory_map=False).age.to_numpy().flags.writeable)
+            with self.assertRaisesRegex(ValidationError, 'name_test'):
+                PeopleDeclaredWithDifferentFields(from_snapshot=path)
+            with mock.patch('src.pandas_oop._snapshot.FORMAT_VERSION', 2):
+                self.assertRaisesRegex(ValidationError, 'format version 1', People, from_snapshot=path)
+
+    @skipIf(find_spec('polars') is None or find_spec('pyarrow') is None, 'polars is not installed')
+    def test_polars_backend(self):
+        import polars as pl
+        lazy_people = People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";", backend='polars', lazy=True)
+        self.assertTrue(lazy_people.is_lazy)
+        adults = lazy_people.filter(pl.col('age') >= 18).collect()
+        self.assertIsInstance(adults, models.PolarsFrame)
+        self.assertTrue(adults.is_valid())
+        self.assertEqual(adults.columns, ['name', 'age', 'money', 'insertion_date', 'is_staff'])
+        self.assertEqual(adults['is_staff'].to_list(), [False])
+        people = People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";")
+        from_polars = People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";", backend='polars').to_pandas()
+        self.assertIsInstance(from_polars, DataFrame)
+        self.assertEqual(from_polars.to_dict(), people.to_dict())
+        self.assertEqual(people.to_polars().to_pandas().to_dict(), people.to_dict())
+
+    def test_compact_columns(self):
+        people = PeopleCompact(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";")
+        self.assertEqual([dtype.name for dtype in people.dtypes],
+                         ['category', 'Int16', 'float32', 'datetime64[ns]', 'bool'])
+        self.assertTrue(people.is_valid())
+        self.assertTrue(people.validate().validation_report.is_noop)
+        self.assertFalse(people.astype({'age': 'int64'}).is_valid())
+
+    def test_compact_integers_out_of_range(self):
+        @models.Data
+        class Ages(models.DataFrame):
+            age = IntegerColumn(bits=8)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ages.csv')
+            pd.DataFrame({'age': [20, 300]}).to_csv(path, index=False)
+            self.assertRaisesRegex(ValidationError, 'out of the range of int8', Ages, from_csv=path)
+        self.assertRaises(ValidationError, Ages, from_iterator=[(20,), (300,)])
+        ages = Ages(from_iterator=[(20,), (100,)])
+        self.assertEqual((ages.age.dtype, ages.age.tolist()), (np.int8, [20, 100]))
+        self.assertRaises(ValidationError, ages.astype({'age': 'int64'}).assign(age=[20, 300]).validate)
+
+    def test_memory_report(self):
+        report = PeopleCompact(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";").memory_report()
+        self.assertEqual(report.loc['money', 'bytes'], 7 * 4)
+        self.assertEqual(report.loc['money', 'default_bytes'], 7 * 8)
+        self.assertEqual(report.loc['money', 'saved_ratio'], 0.5)
+        self.assertEqual(report.loc['total', 'bytes'], report['bytes'].iloc[:-1].sum())
+
     def test_from_sql_query(self):
         people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
         people.sql_engine.execute('delete from people')
@@ -80,6 +209,18 @@ class TestDataframeBehavior(TestCase):
         people.save()
         self.assertTrue(people.is_valid())
 
+    def test_validate_only_converts_mismatched_columns(self):
+        people = People()
+        people.name = self.name_list
+        people.age = self.age_list
+        people.money = self.money_list
+        people.insertion_date = self.string_insertion_date_list
+        people.is_staff = self.is_staff_list
+        people.validate()
+        self.assertEqual(list(people.validation_report.converted), ['insertion_date'])
+        self.assertEqual(people.insertion_date.tolist(), self.insertion_date_list)
+        self.assertTrue(people.validate().validation_report.is_noop)
+
     def test_dataframe_is_not_valid(self):
         people = People()
         people.name = self.name_list
@@ -112,6 +253,62 @@ class TestDataframeBehavior(TestCase):
         self.assertIsInstance(merged_result, DataFrame, 'Not a custom dataframe when abs is called')
         self.assertEqual(merged_result.to_dict(), self.expected_merged_result)
 
+    def test_pandas_operations_return_custom_df(self):
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        results = {
+            'sort_values': people.sort_values('age'),
+            'query': people.query('age > 18'),
+            'assign': people.assign(age=people.age + 1),
+            'groupby_apply': people.groupby('is_staff', group_keys=False).apply(lambda group: group),
+            'concat': pd.concat([people, people]),
+        }
+        for name, result in results.items():
+            self.assertIsInstance(result, DataFrame, f'Not a custom dataframe when {name} is performed')
+            self.assertIs(result.dataframe_state, people.dataframe_state, name)
+
+    def test_concat_takes_state_from_first_custom_df(self):
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        jobs = PeopleJobs(from_csv=PEOPLE2_DATA_FILE, delimiter=";")
+        self.assertEqual(str(pd.concat([people, jobs])), 'People')
+        self.assertEqual(str(pd.concat([jobs, people])), 'PeopleJobs')
+
+    def test_custom_df_built_directly_has_no_model(self):
+        df = DataFrame(pd.DataFrame({'name': ['John']}))
+        self.assertRaises(MissingDecorator, df.validate)
+        self.assertRaises(MissingDecorator, df.check_constraints)
+        self.assertRaises(MissingDecorator, df.track_changes)
+        self.assertRaises(MissingDecorator, df.save)
+        self.assertIsInstance(df.validate(from_class=PeopleTwoColumns), DataFrame)
+
+    def test_from_df_of_another_model(self):
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        two_columns = PeopleTwoColumns(from_df=people)
+        self.assertEqual(two_columns.dataframe_state.class_name, 'PeopleTwoColumns')
+        self.assertIs(two_columns.dataframe_state.schema, PeopleTwoColumns.schema)
+        self.assertEqual(list(two_columns.columns), ['name', 'age'])
+        self.assertEqual(people.dataframe_state.class_name, 'People')
+
+    def test_from_df_does_not_modify_the_source(self):
+        raw = pd.read_csv(PEOPLE_DATA_FILE, delimiter=";")
+        expected = raw.copy()
+        people = People(from_df=raw)
+        self.assertEqual(people.insertion_date.dtype, 'datetime64[ns]')
+        pd.testing.assert_frame_equal(raw, expected)
+
+    def test_pickle_keeps_the_model(self):
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        unpickled = pickle.loads(pickle.dumps(people))
+        self.assertIsInstance(unpickled, DataFrame)
+        self.assertIs(unpickled.dataframe_state, people.dataframe_state)
+        self.assertEqual(unpickled.to_dict(), people.to_dict())
+        self.assertEqual(pickle.loads(pickle.dumps(PeopleNoTable())).dataframe_state.class_name, 'PeopleNoTable')
+
+        @models.Data
+        class LocalPeople(models.DataFrame):
+            name = StringColumn()
+
+        self.assertRaises(pickle.PicklingError, pickle.dumps, LocalPeople())
+
     def test_validate_accept_argument(self):
         people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
         people_jobs = PeopleJobs(from_csv=PEOPLE2_DATA_FILE, delimiter=";")
@@ -128,6 +325,14 @@ class TestDataframeBehavior(TestCase):
         self.assertEqual(people.shape, (1000, 5))
         self.assertTrue(people.is_valid())
 
+    def test_populate_from_iterator_with_chunksize(self):
+        chunks = list(PeopleFromIterator(from_iterator=retrieve_people, chunksize=300))
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+        for chunk in chunks:
+            self.assertIsInstance(chunk, DataFrame, 'Not a custom dataframe when chunksize')
+            self.assertTrue(chunk.validation_report.is_noop)
+        self.assertEqual(chunks[-1].age.tolist(), list(range(900, 1000)))
+
     def test_dataframe_has_column_name_declared(self):
         people = PeopleDeclaredWithDifferentFields(from_csv=PEOPLE_DATA_FILE, delimiter=";")
         self.assertEqual(list(people.columns), ['name_test', 'age', 'money_test', 'insertion_date_test', 'is_staff'])
@@ -152,6 +357,14 @@ class TestDataframeBehavior(TestCase):
         people = people[:1]
         self.assertIsInstance(people, DataFrame, 'Not a custom dataframe when loc set value is performed')
 
+    def test_generic_overrider_reuses_block_manager(self):
+        people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        result = pd.DataFrame(people).head(1)
+        custom_result = DataFrame.generic_overrider(result, people)
+        self.assertIs(custom_result._mgr, result._mgr)
+        self.assertIs(custom_result.dataframe_state, people.dataframe_state)
+        self.assertEqual(str(custom_result), 'People')
+
     def test_multi_loc_conditions(self):
         people = People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";")
         people = people.loc[(people.age < 18) & (people.name.str.startswith("M"))]
@@ -162,6 +375,121 @@ class TestDataframeBehavior(TestCase):
         for people_chunk in People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";", chunksize=2):
             self.assertIsInstance(people_chunk, DataFrame, 'Not a custom dataframe when chunksize')
 
+    def test_pipeline_preserves_order(self):
+        chunks = list(models.Pipeline(People, LOT_OF_PEOPLE_DATA_FILE, chunksize=2, workers=2, delimiter=";"))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 2, 1])
+        for chunk in chunks:
+            self.assertIsInstance(chunk, DataFrame, 'Not a custom dataframe when using a pipeline')
+            self.assertTrue(chunk.is_valid())
+        people = People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";")
+        self.assertEqual(pd.concat(chunks).to_dict(), people.to_dict())
+
+    def test_pipeline_rejects_line_dependent_options(self):
+        with self.assertRaises(ValueError):
+            People(from_csv=LOT_OF_PEOPLE_DATA_FILE, workers=2, delimiter=";", skiprows=1)
+        with self.assertRaises(ValueError):
+            People(from_csv=f'{LOT_OF_PEOPLE_DATA_FILE}.gz', workers=2, delimiter=";")
+
+    def test_ingest_with_sink(self):
+        chunks = []
+        stats = People.ingest(LOT_OF_PEOPLE_DATA_FILE, sink=chunks.append, chunksize=3, workers=2, ordered=False,
+                              delimiter=";")
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 7)
+        self.assertEqual((stats.chunks, stats.parse.rows, stats.write.rows), (3, 7, 7))
+
+    def test_ingest_sink_interrupt_propagates(self):
+        written = []
+
+        def interrupted_sink(chunk):
+            written.append(chunk)
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            People.ingest(LOT_OF_PEOPLE_DATA_FILE, sink=interrupted_sink, chunksize=1, workers=2, delimiter=";")
+        self.assertEqual(len(written), 1)
+
+    def test_from_csv_hive_partitioned_dataset(self):
+        raw = pd.read_csv(LOT_OF_PEOPLE_DATA_FILE, delimiter=";").drop(columns='insertion_date')
+        with tempfile.TemporaryDirectory() as directory:
+            for day, country, rows in (('2005-02-25', 'fr', raw[:3]), ('2005-02-26', 'de', raw[3:])):
+                partition = os.path.join(directory, f'insertion_date={day}', f'country={country}')
+                os.makedirs(partition)
+                rows.to_csv(os.path.join(partition, 'part-0.csv'), sep=';', index=False)
+            people = People(from_csv=os.path.join(directory, '**', '*.csv'), workers=2, partitioning='hive',
+                            delimiter=';')
+            files = list(People(from_csv=directory, partitioning='hive', iterator=True, delimiter=';'))
+        self.assertIsInstance(people, DataFrame)
+        self.assertTrue(people.is_valid())
+        self.assertEqual(people.name.tolist(), raw.name.tolist())
+        self.assertEqual(people.insertion_date.tolist(), [Timestamp('2005-02-25')] * 3 + [Timestamp('2005-02-26')] * 4)
+        self.assertEqual(people.country.dtype, 'category')
+        self.assertEqual(people.country.tolist(), ['fr'] * 3 + ['de'] * 4)
+        self.assertEqual([(len(df), df.country.iloc[0]) for df in files], [(3, 'fr'), (4, 'de')])
+
+    def test_dates_are_parsed_once_across_chunks(self):
+        parser = People.decorated_class.insertion_date.parser
+        parser.clear()
+        chunks = list(People(from_csv=LOT_OF_PEOPLE_DATA_FILE, delimiter=";", chunksize=2))
+        self.assertTrue(all(chunk.is_valid() for chunk in chunks))
+        self.assertEqual(chunks[0].insertion_date.tolist(), [Timestamp('2005-02-25')] * 2)
+        info = parser.cache_info()
+        self.assertEqual((info.misses, info.hits, info.size, info.inferred_format), (1, 3, 1, None))
+        # the declared format is strict
+        self.assertRaises(ValueError, parser.parse, pd.Series(['2005-02-25', '26-02-2005']))
+        # without one, the format inferred from the values is kept for the next values
+        parser = DateParser()
+        dates = parser.parse(pd.Series(['2005-02-25', None, '2005-02-26']))
+        self.assertEqual(dates.tolist(), [Timestamp('2005-02-25'), pd.NaT, Timestamp('2005-02-26')])
+        self.assertEqual(parser.cache_info().inferred_format, '%Y-%m-%d')
+        self.assertEqual(parser.parse(pd.Series(['26-02-2005'])).tolist(), [Timestamp('2005-02-26')])
+
+    def test_date_cache_is_emptied_after_the_lookup(self):
+        parser = DateParser('%d-%m-%Y', max_cached=3)
+        parser.parse(pd.Series(['01-02-2005', '02-02-2005']))
+        dates = parser.parse(pd.Series(['01-02-2005', '03-02-2005', '04-02-2005']))
+        self.assertEqual(dates.tolist(), [Timestamp('2005-02-01'), Timestamp('2005-02-03'), Timestamp('2005-02-04')])
+        self.assertEqual(parser.cache_info().size, 2)
+
+    def test_constraints_report_and_split(self):
+        people = PeopleWithConstraints(from_df=pd.DataFrame({
+            'name': ['John', 'snow', 'John', 'Marie'],
+            'age': [15, -1, 200, 30],
+            'money': [1.0, None, 2.0, 3.0],
+            'job': ['Developer', 'RH', 'Cook', None],
+        }))
+        report = people.check_constraints()
+        self.assertEqual({rule: positions.tolist() for rule, positions in report.violations.items()},
+                         {'name.regex': [1], 'age.min': [1], 'age.max': [2], 'money.nullable': [1],
+                          'job.choices': [2], 'unique': [0, 2]})
+        self.assertEqual(report.invalid_rows, 3)
+        self.assertFalse(people.is_valid())
+        self.assertFalse(people.validate()._DataFrame__is_valide)
+        valid, invalid = people.split_valid()
+        self.assertIsInstance(valid, DataFrame)
+        self.assertEqual(valid.name.tolist(), ['Marie'])
+        self.assertEqual(invalid.index.tolist(), [0, 1, 2])
+        self.assertTrue(valid.is_valid())
+
+    def test_collect_stages(self):
+        spans = []
+        hook = models.add_stage_hook(lambda event: spans.append(event.span_name))
+        try:
+            with models.collect_stages(trace_memory=True) as collector:
+                people = People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+                DataFrame.generic_overrider(pd.DataFrame(people).astype({'age': 'float64'}), people).validate()
+        finally:
+            models.remove_stage_hook(hook)
+        summary = collector.summary()
+        self.assertEqual(list(summary.index),
+                         ['load.read', 'load.convert', 'load.select', 'generic_overrider', 'validate.astype',
+                          'validate.constraints'])
+        self.assertEqual(summary.loc['load.read', 'rows'], 2)
+        self.assertEqual(collector.events[0].attributes, {'source': 'read_csv'})
+        self.assertIsNotNone(collector.events[0].memory_delta)
+        self.assertEqual(spans[0], 'pandas_oop.load.read')
+        People(from_csv=PEOPLE_DATA_FILE, delimiter=";")
+        self.assertEqual(len(collector.events), 6)
+
     def setUp(self):
         # Old school creation
         self.old_school_df = pd.DataFrame({'name': pd.Series(dtype='O'),
@@ -230,4 +558,4 @@ class TestDataframeBehavior(TestCase):
             },
         }
 
-        self.string_insertion_date_list = ['25-02-2005', '25-02-2005']
+        self.string_insertion_date_list = ['2005-02-25', '2005-02-25']
@@ -1,10 +1,12 @@
 import sqlite3
+from importlib.util import find_spec
 from pathlib import Path
 
 from pandas import Timestamp
 from sqlalchemy.ext.declarative import declarative_base
 from src.pandas_oop import models
-from src.pandas_oop.fields import StringColumn, IntegerColumn, FloatColumn, DateColumn, BoolColumn
+from src.pandas_oop.fields import StringColumn, IntegerColumn, FloatColumn, DateColumn, BoolColumn, CategoryColumn, \
+    DecimalColumn, JSONColumn, TimestampTZColumn
 
 Base = declarative_base()
 
@@ -38,7 +40,7 @@ class People(models.DataFrame):
     name = StringColumn()
     age = IntegerColumn()
     money = FloatColumn()
-    insertion_date = DateColumn(format='%d-%m-%Y')
+    insertion_date = DateColumn(format='%Y-%m-%d')
     is_staff = BoolColumn(true='yes', false='no')
 
 
@@ -53,7 +55,7 @@ class MergedPeople(models.DataFrame):
     name = StringColumn()
     age = IntegerColumn()
     money = FloatColumn()
-    insertion_date = DateColumn(format='%d-%m-%Y')
+    insertion_date = DateColumn(format='%Y-%m-%d')
     is_staff = BoolColumn(true='yes', false='no')
     job = StringColumn()
 
@@ -96,6 +98,36 @@ class PeopleFromIterator(models.DataFrame):
     is_staff = BoolColumn()
 
 
+@models.sql(table='people_compact', con=DB_CONNECTION)
+@models.Data
+class PeopleCompact(models.DataFrame):
+    name = StringColumn(categorical=True)
+    age = IntegerColumn(bits=16, nullable=True)
+    money = FloatColumn(bits=32)
+    insertion_date = DateColumn(format='%Y-%m-%d')
+    is_staff = BoolColumn(true='yes', false='no')
+
+
+@models.sql(table='people_constraints', con=DB_CONNECTION)
+@models.Data
+class PeopleWithConstraints(models.DataFrame):
+    name = StringColumn(unique=True, regex='[A-Z][a-z]+')
+    age = IntegerColumn(min=0, max=120)
+    money = FloatColumn(nullable=False)
+    job = StringColumn(choices=['Developer', 'RH'])
+
+
+if find_spec('pyarrow') is not None:
+    @models.sql(table='orders', con=DB_CONNECTION)
+    @models.Data
+    class Orders(models.DataFrame):
+        order_id = IntegerColumn(unique=True)
+        amount = DecimalColumn(precision=10, scale=2)
+        ordered_at = TimestampTZColumn(tz='Europe/Paris')
+        status = CategoryColumn(categories=['new', 'paid', 'shipped'])
+        details = JSONColumn()
+
+
 @models.Data
 class PeopleDeclaredWithDifferentFields(models.DataFrame):
     name_test = StringColumn(target_name='name')